@@ -5,22 +5,21 @@ import sys
 import time
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, FrozenSet, List, Set
+from typing import Dict, List
 
-import psutil
 from tap import Tap
 
 from preq_pmob.equation import Equation
-from preq_pmob.equation_group import EquationGroup
 from preq_pmob.model_builder import ModelBuilder
+from preq_pmob.results import ModelSet
 
 
 class Args(Tap):
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     data_dir: Path = Path("data/cases/generated_cases")
     result_dir: Path = Path("results") / timestamp
-    result_dir.mkdir(parents=True, exist_ok=True)
     log_filename = result_dir / "experiment.log"
+    json_results: bool = False  # Also write the built models as JSON
 
 
 def setup_logging(log_filename: Path) -> None:
@@ -33,6 +32,8 @@ def setup_logging(log_filename: Path) -> None:
 
 
 def display_environment() -> None:
+    import psutil
+
     logging.info("Python version: %s", sys.version)
     logging.info("Platform: %s %s", platform.system(), platform.release())
     logging.info("Machine: %s", platform.machine())
@@ -68,45 +69,6 @@ def parse_symbols(variable_names: List[str]) -> List[str]:
     return [var for var in variable_names]
 
 
-def equation_group_to_set(eq_group: EquationGroup) -> FrozenSet[str]:
-    return frozenset(eq.equation_str for eq in eq_group.equations)
-
-
-def extract_equations_from_correct_models(
-    correct_models: List[Dict[str, List[str]]]
-) -> Set[FrozenSet[str]]:
-    return set(frozenset(model["equations"]) for model in correct_models)
-
-
-def compare_models(
-    built_models: List[EquationGroup], expected_set: Set[FrozenSet[str]]
-) -> Dict:
-    built_set = set(equation_group_to_set(model) for model in built_models)
-    success = built_set == expected_set
-    n_expected = len(expected_set)
-    n_built = len(built_set)
-    n_correct = len(built_set & expected_set)
-
-    recall = n_correct / n_expected
-    precision = n_correct / n_built if n_built > 0 else 0
-    f1 = (
-        2 * (recall * precision) / (recall + precision)
-        if recall + precision > 0
-        else 0
-    )
-
-    result = {
-        "success": success,
-        "n_expected": n_expected,
-        "n_built": n_built,
-        "n_correct": n_correct,
-        "recall": recall,
-        "precision": precision,
-        "f1": f1,
-    }
-    return result
-
-
 def run_case(case: Dict) -> None:
     case_name = case.get("name", "Unnamed Case")
     logging.info(f"Running {case_name}...")
@@ -123,14 +85,21 @@ def run_case(case: Dict) -> None:
         f"  Number of equations: {len(equations)}"
     )
 
-    correct_models = extract_equations_from_correct_models(
-        case["correct_models"]
+    equation_table = ModelSet.equation_table(
+        eq_data["equation"] for eq_data in case["equations"]
+    )
+    correct_models = ModelSet.from_equation_lists(
+        (model["equations"] for model in case["correct_models"]),
+        equation_table,
     )
 
     for method in [
         "exhaustive",
         "gradual",
         "refined_gradual",
+        "two_step_combination",
+        "product_recursive_combination",
+        "sat",
     ]:
         logging.info("-" * 50)
         print(f"    Running {method} method...")
@@ -144,7 +113,8 @@ def run_case(case: Dict) -> None:
         elapsed_time = end_time - start_time
         logging.info(f"  {method} method took {elapsed_time:.2e} seconds")
 
-        result = compare_models(models, correct_models)
+        built_models = ModelSet.from_groups(models, equation_table)
+        result = built_models.compare(correct_models)
 
         if result["n_expected"] == result["n_correct"]:
             logging.info(f"  {method} method: PASS")
@@ -156,29 +126,17 @@ def run_case(case: Dict) -> None:
             f"Correct: {result['n_correct']}"
         )
 
-        filename = f"{case_name}_{method}.json"
-        filepath = args.result_dir / filename
-        with open(filepath, "w") as f:
-            json.dump(
-                {
-                    "built_models": [
-                        list(equation_group_to_set(model)) for model in models
-                    ],
-                    "success": result["success"],
-                    "n_expected": result["n_expected"],
-                    "n_built": result["n_built"],
-                    "n_correct": result["n_correct"],
-                    "recall": result["recall"],
-                    "precision": result["precision"],
-                    "f1": result["f1"],
-                    "elapsed_time": elapsed_time,
-                },
-                f,
-                indent=2,
-            )
+        built_models.save(args.result_dir / f"{case_name}_{method}.npz")
+        summary = {**result, "elapsed_time": elapsed_time}
+        if args.json_results:
+            summary["built_models"] = built_models.to_json()
+        with open(args.result_dir / f"{case_name}_{method}.json", "w") as f:
+            json.dump(summary, f, indent=2)
 
 
 def main(args: Args) -> None:
+    args.result_dir.mkdir(parents=True, exist_ok=True)
+    args.log_filename.parent.mkdir(parents=True, exist_ok=True)
     setup_logging(args.log_filename)
     display_environment()
     cases = load_cases(args.data_dir)
@@ -1,3 +1,4 @@
 from .equation import Equation
 from .equation_group import EquationGroup
+from .equation_library import EquationLibrary
 from .model_builder import ModelBuilder
@@ -0,0 +1,122 @@
+"""
+Command-line entry point: python -m preq_pmob CASE_FILE [options]
+
+Reads a case file in the JSON format described in the README (or stdin
+when CASE_FILE is "-"), builds its models and writes them as JSON. Only
+the standard library and the pure-Python core are imported at startup;
+the package import is expected to stay within IMPORT_TIME_BUDGET.
+"""
+
+import argparse
+import json
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+from .equation import Equation
+from .model_builder import METHODS, BuildCancelled, ModelBuilder
+
+# Seconds allowed for `import preq_pmob.cli` in a fresh interpreter, as
+# reported by python -X importtime
+IMPORT_TIME_BUDGET = 0.1
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m preq_pmob",
+        description="Build physical models from a case file.",
+    )
+    parser.add_argument(
+        "case_file", nargs="?", default="-", help='case JSON, "-" for stdin'
+    )
+    parser.add_argument("-m", "--method", choices=METHODS, default="sat")
+    parser.add_argument(
+        "-o", "--output", default="-", help='output JSON, "-" for stdout'
+    )
+    parser.add_argument(
+        "--count",
+        action="store_true",
+        help="only count the models",
+    )
+    parser.add_argument(
+        "--top-k",
+        type=int,
+        help="only return the k models with the fewest equations",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        help="seconds after which the models found so far are returned",
+    )
+    parser.add_argument("--indent", type=int)
+    return parser.parse_args(argv)
+
+
+def load_case(case_file: str) -> Dict[str, Any]:
+    if case_file == "-":
+        case: Dict[str, Any] = json.load(sys.stdin)
+    else:
+        with open(case_file) as f:
+            case = json.load(f)
+    return case
+
+
+def run(case: Dict[str, Any], args: argparse.Namespace) -> Dict[str, Any]:
+    equations = [
+        Equation(eq_data["equation"], eq_data["variables"])
+        for eq_data in case["equations"]
+    ]
+    deadline = (
+        time.monotonic() + args.timeout if args.timeout is not None else None
+    )
+    builder = ModelBuilder(
+        equations,
+        case["variables"]["input_variables"],
+        case["variables"]["output_variables"],
+        method=args.method,
+        deadline=deadline,
+    )
+
+    # --count and --top-k run their own searches whatever the method
+    if args.count:
+        method = "count"
+    elif args.top_k is not None:
+        method = "top_k"
+    else:
+        method = args.method
+    result: Dict[str, Any] = {"name": case.get("name"), "method": method}
+    start_time = time.perf_counter()
+    if args.count:
+        # A cancelled count has no partial value
+        try:
+            result["n_models"] = builder.count_models()
+            result["incomplete"] = False
+        except BuildCancelled:
+            result["n_models"] = None
+            result["incomplete"] = True
+        result["elapsed_time"] = time.perf_counter() - start_time
+        return result
+
+    if args.top_k is not None:
+        models = builder.top_k(args.top_k)
+    else:
+        models = builder.build_models()
+    result["elapsed_time"] = time.perf_counter() - start_time
+    result["incomplete"] = models.incomplete
+    result["n_models"] = len(models)
+    result["built_models"] = [
+        sorted(eq.equation_str for eq in model.equations) for model in models
+    ]
+    return result
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    result = run(load_case(args.case_file), args)
+    if args.output == "-":
+        json.dump(result, sys.stdout, indent=args.indent)
+        sys.stdout.write("\n")
+    else:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=args.indent)
+    return 1 if result["incomplete"] else 0
@@ -0,0 +1,189 @@
+"""
+Exact model counting without enumeration.
+
+Equations with the same variable set are interchangeable: the four
+predefined requirements only see how many of them are selected, so each
+such class contributes comb(m, j) subsets for j selected equations (at
+most one for a class of constant equations). Classes are split into
+connected components over shared variables. Required variable inclusion,
+solvability and unique constants are local to a component, so each
+component is counted with a frontier dynamic program that tracks, for the
+variables still shared with unprocessed classes, how many selected
+equations contain them (capped at 2). The counts are kept per degree of
+freedom and the components are combined by convolution, since the DOF
+requirement is the only global one.
+"""
+
+from math import comb
+from typing import (
+    Callable,
+    Dict,
+    FrozenSet,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
+
+from .equation import Equation
+
+Checkpoint = Callable[[], None]
+
+# (variables, number of equations) of a class of interchangeable equations
+EquationClass = Tuple[FrozenSet[str], int]
+
+
+def equation_classes(equations: Sequence[Equation]) -> List[EquationClass]:
+    sizes: Dict[FrozenSet[str], int] = {}
+    for eq in equations:
+        sizes[eq.variables] = sizes.get(eq.variables, 0) + 1
+    return list(sizes.items())
+
+
+def _components(classes: List[EquationClass]) -> List[List[EquationClass]]:
+    parent: Dict[str, str] = {}
+
+    def find(var: str) -> str:
+        while parent[var] != var:
+            parent[var] = parent[parent[var]]
+            var = parent[var]
+        return var
+
+    for variables, _ in classes:
+        for var in variables:
+            parent.setdefault(var, var)
+        root = None
+        for var in variables:
+            if root is None:
+                root = find(var)
+            else:
+                parent[find(var)] = root
+
+    components: Dict[Optional[str], List[EquationClass]] = {}
+    for eq_class in classes:
+        variables = eq_class[0]
+        root = find(next(iter(variables))) if variables else None
+        components.setdefault(root, []).append(eq_class)
+    return list(components.values())
+
+
+def _order_classes(component: List[EquationClass]) -> List[EquationClass]:
+    """
+    Order classes so that each one shares as many variables as possible
+    with the classes before it, which keeps the frontier small.
+    """
+    remaining = sorted(component, key=lambda c: (len(c[0]), sorted(c[0])))
+    ordered = [remaining.pop(0)]
+    seen: Set[str] = set(ordered[0][0])
+    while remaining:
+        best = max(
+            range(len(remaining)),
+            key=lambda i: (
+                len(remaining[i][0] & seen),
+                -len(remaining[i][0] - seen),
+            ),
+        )
+        ordered.append(remaining.pop(best))
+        seen |= ordered[-1][0]
+    return ordered
+
+
+def _count_component(
+    component: List[EquationClass],
+    required_vars: Set[str],
+    checkpoint: Optional[Checkpoint] = None,
+) -> Dict[int, int]:
+    """
+    Return the number of subsets of the component's equations, including
+    the empty one, that satisfy the local requirements, keyed by their
+    degrees of freedom.
+    """
+    ordered = _order_classes(component)
+    last_use: Dict[str, int] = {}
+    for index, (variables, _) in enumerate(ordered):
+        for var in variables:
+            last_use[var] = index
+
+    frontier: List[str] = []
+    # (capped counts of the frontier variables, DOF so far) -> subsets
+    states: Dict[Tuple[Tuple[int, ...], int], int] = {((), 0): 1}
+    for index, (variables, size) in enumerate(ordered):
+        new_vars = sorted(variables - set(frontier))
+        extended = frontier + new_vars
+        positions = [extended.index(var) for var in sorted(variables)]
+        retired = [
+            i for i, var in enumerate(extended) if last_use[var] == index
+        ]
+        kept = [i for i, var in enumerate(extended) if last_use[var] != index]
+        # Unique Constant Equations
+        max_selected = 1 if len(variables) == 1 else size
+        options = [(j, comb(size, j)) for j in range(max_selected + 1)]
+
+        new_states: Dict[Tuple[Tuple[int, ...], int], int] = {}
+        for (counts, dof), n_subsets in states.items():
+            if checkpoint is not None:
+                checkpoint()
+            base = list(counts) + [0] * len(new_vars)
+            for j, n_ways in options:
+                new_counts = list(base)
+                for i in positions:
+                    new_counts[i] = min(new_counts[i] + j, 2)
+                new_dof = dof - j
+                for i in retired:
+                    count = new_counts[i]
+                    if extended[i] in required_vars:
+                        # Required Variables Inclusion
+                        if count == 0:
+                            break
+                    elif count == 1:
+                        # Solvability
+                        break
+                    if count > 0:
+                        new_dof += 1
+                else:
+                    key = (tuple(new_counts[i] for i in kept), new_dof)
+                    new_states[key] = (
+                        new_states.get(key, 0) + n_subsets * n_ways
+                    )
+        states = new_states
+        frontier = [extended[i] for i in kept]
+
+    counts_by_dof: Dict[int, int] = {}
+    for (_, dof), n_subsets in states.items():
+        counts_by_dof[dof] = counts_by_dof.get(dof, 0) + n_subsets
+    return counts_by_dof
+
+
+def count_models(
+    equations: Sequence[Equation],
+    input_vars: Set[str],
+    required_vars: Set[str],
+    checkpoint: Optional[Checkpoint] = None,
+) -> int:
+    """
+    Return the number of non-empty subsets of equations that satisfy the
+    four predefined requirements.
+    """
+    classes = equation_classes(equations)
+    covered_vars = {var for variables, _ in classes for var in variables}
+    if not required_vars <= covered_vars:
+        return 0
+
+    totals: Dict[int, int] = {0: 1}
+    for component in _components(classes):
+        counts_by_dof = _count_component(component, required_vars, checkpoint)
+        convolved: Dict[int, int] = {}
+        for dof, n_subsets in totals.items():
+            for component_dof, n_component in counts_by_dof.items():
+                key = dof + component_dof
+                convolved[key] = (
+                    convolved.get(key, 0) + n_subsets * n_component
+                )
+        totals = convolved
+
+    n_models = totals.get(len(input_vars), 0)
+    if not required_vars and not input_vars:
+        # The empty subset is not a model
+        n_models -= 1
+    return n_models
@@ -0,0 +1,132 @@
+"""
+Memory-bounded deduplication of canonical model keys.
+
+A KeyStore collects the integer keys of equation subsets (the ordinal
+bitmasks of EquationGroup.key) in a Python set. When the estimated size of
+the set reaches the memory limit, its keys are sorted and written as a
+run of fixed-width big-endian records to a temporary file, and the set is
+cleared. Runs are merged by level: a spilled run has level 0, and
+whenever the FAN_IN newest runs share a level they are merged into one
+run of the next level. Each key is thus rewritten once per level, and
+the number of open files grows with the logarithm of the number of
+spills. Iterating the store merges the runs
+with the keys still in memory and yields each distinct key once, in
+ascending order.
+"""
+
+import sys
+import tempfile
+from heapq import merge
+from typing import IO, Callable, Iterable, Iterator, List, Optional, Set
+
+# Estimated bytes per set slot, on top of the int object itself
+_SET_SLOT_SIZE = 32
+
+# Records read from a run per disk read
+_READ_RECORDS = 4096
+
+# Runs of the same level merged into one run of the next level
+FAN_IN = 16
+
+
+class KeyStore:
+    def __init__(
+        self,
+        key_bytes: int,
+        memory_limit: Optional[int] = None,
+        on_spill: Optional[Callable[[], None]] = None,
+    ) -> None:
+        """
+        Args:
+            key_bytes (int): Bytes needed to write the largest key.
+            memory_limit (int): Estimated bytes the in-memory keys may
+                use before they are spilled to disk. None keeps all keys
+                in memory.
+            on_spill (Callable): Called each time a run is written.
+        """
+        self.key_bytes: int = max(1, key_bytes)
+        self.memory_limit: Optional[int] = memory_limit
+        self.on_spill: Optional[Callable[[], None]] = on_spill
+        self.n_runs: int = 0
+        self._keys: Set[int] = set()
+        self._memory: int = 0
+        self._runs: List[IO[bytes]] = []
+        # Merge level of each run, non-increasing along self._runs
+        self._levels: List[int] = []
+
+    def add(self, key: int) -> None:
+        if key in self._keys:
+            return
+        self._keys.add(key)
+        self._memory += sys.getsizeof(key) + _SET_SLOT_SIZE
+        if self.memory_limit is not None and self._memory >= self.memory_limit:
+            self._spill()
+
+    def _spill(self) -> None:
+        self._runs.append(self._write_run(sorted(self._keys)))
+        self._levels.append(0)
+        self.n_runs += 1
+        self._keys = set()
+        self._memory = 0
+        while (
+            len(self._levels) >= FAN_IN
+            and self._levels[-FAN_IN] == self._levels[-1]
+        ):
+            self._merge_runs()
+        if self.on_spill is not None:
+            self.on_spill()
+
+    def _write_run(self, keys: Iterable[int]) -> IO[bytes]:
+        run = tempfile.TemporaryFile()
+        batch: List[bytes] = []
+        for key in keys:
+            batch.append(key.to_bytes(self.key_bytes, "big"))
+            if len(batch) == _READ_RECORDS:
+                run.write(b"".join(batch))
+                batch = []
+        run.write(b"".join(batch))
+        run.seek(0)
+        return run
+
+    def _merge_runs(self) -> None:
+        """
+        Merge the FAN_IN newest runs into one run of the next level.
+        """
+        runs = self._runs[-FAN_IN:]
+        level = self._levels[-1] + 1
+        del self._runs[-FAN_IN:], self._levels[-FAN_IN:]
+        self._runs.append(self._write_run(self._merged(runs)))
+        self._levels.append(level)
+        for run in runs:
+            run.close()
+
+    def _read_run(self, run: IO[bytes]) -> Iterator[int]:
+        run.seek(0)
+        while chunk := run.read(self.key_bytes * _READ_RECORDS):
+            for start in range(0, len(chunk), self.key_bytes):
+                yield int.from_bytes(
+                    chunk[start : start + self.key_bytes], "big"
+                )
+
+    def _merged(
+        self, runs: List[IO[bytes]], keys: Iterable[int] = ()
+    ) -> Iterator[int]:
+        prev_key = None
+        for key in merge(keys, *(self._read_run(run) for run in runs)):
+            if key != prev_key:
+                yield key
+                prev_key = key
+
+    def __iter__(self) -> Iterator[int]:
+        if not self._runs:
+            yield from sorted(self._keys)
+            return
+        yield from self._merged(self._runs, sorted(self._keys))
+
+    def close(self) -> None:
+        for run in self._runs:
+            run.close()
+        self._runs = []
+        self._levels = []
+        self._keys = set()
+        self._memory = 0
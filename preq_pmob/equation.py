@@ -1,13 +1,142 @@
-from typing import List, Set
+import sys
+from typing import (
+    Any,
+    Dict,
+    FrozenSet,
+    Iterable,
+    Mapping,
+    Optional,
+    Tuple,
+)
+
+
+def number_variables(equations: Iterable["Equation"]) -> Dict[str, int]:
+    """
+    Assign bit positions to the variables of the equations, in order of
+    first appearance.
+    """
+    variable_bits: Dict[str, int] = {}
+    for eq in equations:
+        for var in sorted(eq.variables):
+            variable_bits.setdefault(var, len(variable_bits))
+    return variable_bits
+
+
+def variable_mask(
+    variables: Iterable[str], variable_bits: Mapping[str, int]
+) -> int:
+    mask = 0
+    for var in variables:
+        mask |= 1 << variable_bits[var]
+    return mask
 
 
 class Equation:
-    def __init__(self, equation_str: str, variables: List[str]) -> None:
-        self.equation_str: str = equation_str
-        self.variables: Set[str] = set(var for var in variables)
+    """
+    Immutable equation with interned variable names, a cached content hash,
+    and the ordinal and variable bitmask assigned by the EquationLibrary
+    or ModelBuilder that numbers it (-1 and 0 if unset). Masks of
+    equations numbered by different owners are not comparable. Equality
+    and hashing use the equation string and variables only, so numbered
+    copies equal the equations they were made from.
+    """
+
+    __slots__ = ("equation_str", "variables", "ordinal", "mask", "_hash")
+
+    equation_str: str
+    variables: FrozenSet[str]
+    ordinal: int
+    mask: int
+    _hash: int
+
+    def __init__(
+        self,
+        equation_str: str,
+        variables: Iterable[str],
+        ordinal: int = -1,
+        mask: int = 0,
+    ) -> None:
+        interned = frozenset(sys.intern(var) for var in variables)
+        self._init_slots(
+            equation_str,
+            interned,
+            ordinal,
+            mask,
+            hash((equation_str, interned)),
+        )
+
+    def _init_slots(
+        self,
+        equation_str: str,
+        variables: FrozenSet[str],
+        ordinal: int,
+        mask: int,
+        hash_value: int,
+    ) -> None:
+        object.__setattr__(self, "equation_str", equation_str)
+        object.__setattr__(self, "variables", variables)
+        object.__setattr__(self, "ordinal", ordinal)
+        object.__setattr__(self, "mask", mask)
+        object.__setattr__(self, "_hash", hash_value)
+
+    def with_ordinal(
+        self,
+        ordinal: int,
+        variable_bits: Optional[Mapping[str, int]] = None,
+    ) -> "Equation":
+        """
+        Return a copy with the given ordinal and, if variable_bits is
+        given, the variable bitmask in that numbering.
+        """
+        mask = (
+            self.mask
+            if variable_bits is None
+            else variable_mask(self.variables, variable_bits)
+        )
+        if ordinal == self.ordinal and mask == self.mask:
+            return self
+        eq = object.__new__(Equation)
+        eq._init_slots(
+            self.equation_str, self.variables, ordinal, mask, self._hash
+        )
+        return eq
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError("Equation is immutable")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError("Equation is immutable")
+
+    def __reduce__(
+        self,
+    ) -> Tuple[type, Tuple[str, Tuple[str, ...], int, int]]:
+        return (
+            Equation,
+            (
+                self.equation_str,
+                tuple(self.variables),
+                self.ordinal,
+                self.mask,
+            ),
+        )
+
+    def __hash__(self) -> int:
+        return self._hash
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Equation):
+            return NotImplemented
+        return (
+            self._hash == other._hash
+            and self.equation_str == other.equation_str
+            and self.variables == other.variables
+        )
 
     def __repr__(self) -> str:
         return f"Equation('{self.equation_str}')"
 
     def __lt__(self, other: "Equation") -> bool:
-        return self.equation_str < other.equation_str
+        return (self.ordinal, self.equation_str) < (
+            other.ordinal,
+            other.equation_str,
+        )
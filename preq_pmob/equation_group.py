@@ -1,7 +1,10 @@
-from typing import List, Set
+from functools import cached_property
+from typing import FrozenSet, List, Set, Tuple, Union
 
 from .equation import Equation
 
+CanonicalKey = Union[int, Tuple[str, ...]]
+
 
 class EquationGroup:
     def __init__(self, equations: List[Equation]) -> None:
@@ -9,17 +12,46 @@ class EquationGroup:
         self.variables: Set[str] = self.get_all_variables()
         self.num_equations: int = len(self.equations)
 
+    @cached_property
+    def key(self) -> CanonicalKey:
+        """
+        Bitmask of the equation ordinals, computed on first use. Groups
+        containing equations that have not been numbered fall back to
+        their sorted equation strings.
+        """
+        mask = 0
+        for eq in self.equations:
+            if eq.ordinal < 0:
+                return self.equation_strs
+            mask |= 1 << eq.ordinal
+        return mask
+
+    @cached_property
+    def equation_strs(self) -> Tuple[str, ...]:
+        return tuple(sorted(eq.equation_str for eq in self.equations))
+
+    @cached_property
+    def _content(self) -> FrozenSet[Equation]:
+        # Equations hash by content, so this key is the same wherever the
+        # group was built
+        return frozenset(self.equations)
+
+    @cached_property
+    def ordinals(self) -> Tuple[int, ...]:
+        return tuple(sorted(eq.ordinal for eq in self.equations))
+
     def __lt__(self, other: "EquationGroup") -> bool:
         # Compare the number of equations first
         if self.num_equations != other.num_equations:
             return self.num_equations < other.num_equations
+        # Compare the equation ordinals
+        if isinstance(self.key, int) and isinstance(other.key, int):
+            return self.ordinals < other.ordinals
         # Compare the equation strings
-        return sorted(eq.equation_str for eq in self.equations) < sorted(
-            eq.equation_str for eq in other.equations
-        )
+        return self.equation_strs < other.equation_strs
 
     def __hash__(self) -> int:
-        return hash(tuple(sorted(self.equations, key=lambda x: str(x))))
+        return hash(self._content)
 
     def __eq__(self, other: object) -> bool:
         if not isinstance(other, EquationGroup):
@@ -27,10 +59,8 @@ class EquationGroup:
         # Compare the number of equations first
         if self.num_equations != other.num_equations:
             return False
-        # Compare the sorted EquationGroup
-        self_eqs = sorted(eq.equation_str for eq in self.equations)
-        other_eqs = sorted(eq.equation_str for eq in other.equations)
-        return self_eqs == other_eqs
+        # Compare the equations by content
+        return self._content == other._content
 
     def __repr__(self) -> str:
         eqs = ", ".join(sorted([eq.equation_str for eq in self.equations]))
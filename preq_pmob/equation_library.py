@@ -0,0 +1,112 @@
+"""
+Shared, pre-indexed equation library.
+
+An EquationLibrary numbers its equations and their variables once,
+normalizes variable names so that spellings such as `x_1`, `x1` and
+`x_{1}` from different sources denote the same variable, and keeps an
+inverted variable -> equation index. ModelBuilder instances created from the same library
+reuse its equations and index instead of rebuilding them.
+"""
+
+import sys
+from array import array
+from typing import Callable, Dict, Iterable, Iterator, List, Set
+
+from .equation import Equation, number_variables
+
+
+def normalize_variable(var: str) -> str:
+    """
+    Drop whitespace, underscores and braces from a variable name.
+    """
+    return "".join(c for c in var if not c.isspace() and c not in "_{}")
+
+
+class EquationLibrary:
+    def __init__(
+        self,
+        equations: Iterable[Equation],
+        normalize: Callable[[str], str] = normalize_variable,
+    ) -> None:
+        """
+        Args:
+            equations (Iterable[Equation]): Equations of the library. They
+                are numbered in the given order.
+            normalize (Callable): Maps a variable name to its canonical
+                spelling.
+        """
+        self.normalize_fn: Callable[[str], str] = normalize
+        normalized = [
+            Equation(
+                eq.equation_str, [self.normalize(var) for var in eq.variables]
+            )
+            for eq in equations
+        ]
+        # Bit positions of the variables in the equation masks
+        self.variable_bits: Dict[str, int] = number_variables(normalized)
+        self.equations: List[Equation] = [
+            eq.with_ordinal(ordinal, self.variable_bits)
+            for ordinal, eq in enumerate(normalized)
+        ]
+
+        postings: Dict[str, List[int]] = {}
+        for eq in self.equations:
+            for var in eq.variables:
+                postings.setdefault(var, []).append(eq.ordinal)
+        # Ordinals of the equations containing each variable, ascending
+        self.index: Dict[str, array] = {
+            var: array("i", ordinals) for var, ordinals in postings.items()
+        }
+        self._bitsets: Dict[str, int] = {}
+        for var, ordinals in postings.items():
+            bitset = 0
+            for ordinal in ordinals:
+                bitset |= 1 << ordinal
+            self._bitsets[var] = bitset
+        self._var_to_eq_map: Dict[str, Set[Equation]] = {}
+
+    def __len__(self) -> int:
+        return len(self.equations)
+
+    def __iter__(self) -> Iterator[Equation]:
+        return iter(self.equations)
+
+    @property
+    def variables(self) -> Set[str]:
+        return set(self.index)
+
+    def normalize(self, var: str) -> str:
+        return sys.intern(self.normalize_fn(var))
+
+    def equations_with(self, var: str) -> List[Equation]:
+        return [
+            self.equations[ordinal]
+            for ordinal in self.index.get(self.normalize(var), ())
+        ]
+
+    def equations_touching(self, variables: Iterable[str]) -> List[Equation]:
+        """
+        Return the equations containing any of the variables, in library
+        order.
+        """
+        bitset = 0
+        for var in variables:
+            bitset |= self._bitsets.get(self.normalize(var), 0)
+        touching: List[Equation] = []
+        while bitset:
+            low_bit = bitset & -bitset
+            touching.append(self.equations[low_bit.bit_length() - 1])
+            bitset ^= low_bit
+        return touching
+
+    def var_to_eq_map(self) -> Dict[str, Set[Equation]]:
+        """
+        Variable -> equations map in the form used by ModelBuilder, built
+        on first use and shared afterwards. Callers must not modify it.
+        """
+        if not self._var_to_eq_map:
+            self._var_to_eq_map = {
+                var: {self.equations[ordinal] for ordinal in ordinals}
+                for var, ordinals in self.index.items()
+            }
+        return self._var_to_eq_map
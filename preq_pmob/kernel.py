@@ -0,0 +1,182 @@
+"""
+Batched check of equation subsets against the four predefined
+requirements.
+
+Subsets are encoded as bitmasks over equation positions (bit i selects
+equations[i]). With NumPy available, a batch is expanded into a 0/1
+selection matrix and multiplied with the equation-variable incidence
+matrix, so that every requirement becomes a vectorized reduction over the
+per-variable counts. Without NumPy, each subset is checked with
+EquationGroup.check_desirability_at_once. NumPy is imported on first use
+to keep the package import fast.
+"""
+
+import importlib.util
+from functools import lru_cache
+from itertools import combinations
+from math import comb
+from typing import Any, Dict, Iterator, List, Sequence, Set, Tuple
+
+from .equation import Equation
+from .equation_group import EquationGroup
+
+ACCELERATED = importlib.util.find_spec("numpy") is not None
+
+# Number of subsets checked per NumPy call
+BATCH_SIZE = 8192
+
+# Largest library whose masks fit in a uint64
+MAX_UINT64_EQUATIONS = 64
+
+
+@lru_cache(maxsize=None)
+def _numpy() -> Any:
+    import numpy
+
+    return numpy
+
+
+def combination_masks(
+    n_items: int, size: int, batch_size: int = BATCH_SIZE
+) -> Iterator[Any]:
+    """
+    Yield the masks of all size-subsets of n_items (at most 64) as uint64
+    arrays, in itertools.combinations order.
+
+    The last elements of each subset are taken from precomputed tables of
+    tail combinations, so that only the leading elements are enumerated
+    in Python.
+    """
+    np = _numpy()
+    tail_size = 0
+    while tail_size < size and comb(n_items, tail_size + 1) <= batch_size:
+        tail_size += 1
+    tails: Dict[Tuple[int, int], Any] = {}
+
+    def tail_masks(start: int, k: int) -> Any:
+        # Masks of the k-subsets of range(start, n_items), in order
+        if k == 0:
+            return np.zeros(1, dtype=np.uint64)
+        if (start, k) not in tails:
+            tails[start, k] = np.concatenate(
+                [np.zeros(0, dtype=np.uint64)]
+                + [
+                    np.uint64(1 << first) | tail_masks(first + 1, k - 1)
+                    for first in range(start, n_items - k + 1)
+                ]
+            )
+        return tails[start, k]
+
+    pending: List[Any] = []
+    n_pending = 0
+    for head in combinations(range(n_items - tail_size), size - tail_size):
+        head_mask = 0
+        for i in head:
+            head_mask |= 1 << i
+        masks = np.uint64(head_mask) | tail_masks(
+            head[-1] + 1 if head else 0, tail_size
+        )
+        pending.append(masks)
+        n_pending += len(masks)
+        if n_pending >= batch_size:
+            yield np.concatenate(pending)
+            pending, n_pending = [], 0
+    if n_pending:
+        yield np.concatenate(pending)
+
+
+class SubsetChecker:
+    def __init__(
+        self,
+        equations: Sequence[Equation],
+        input_vars: Set[str],
+        required_vars: Set[str],
+    ) -> None:
+        self.equations: List[Equation] = list(equations)
+        self.input_vars: Set[str] = input_vars
+        self.required_vars: Set[str] = required_vars
+        if not ACCELERATED:
+            return
+        np = _numpy()
+
+        variables = sorted(
+            {var for eq in self.equations for var in eq.variables}
+        )
+        columns = {var: i for i, var in enumerate(variables)}
+        # float32 keeps the products in BLAS and is exact for these counts
+        shape = (len(self.equations), len(variables))
+        self._incidence = np.zeros(shape, np.float32)
+        self._constants = np.zeros(shape, np.float32)
+        for row, eq in enumerate(self.equations):
+            for var in eq.variables:
+                self._incidence[row, columns[var]] = 1
+                if len(eq.variables) == 1:
+                    self._constants[row, columns[var]] = 1
+        is_required = np.array(
+            [var in required_vars for var in variables], dtype=bool
+        )
+        self._required_cols = np.flatnonzero(is_required)
+        self._internal_cols = np.flatnonzero(~is_required)
+        # Required variables missing from every equation can't be covered
+        self._coverable = required_vars <= columns.keys()
+
+    def check_masks(self, masks: Sequence[int]) -> List[int]:
+        """
+        Return the masks of the subsets that satisfy all four
+        requirements, in input order. With NumPy, masks may also be a
+        uint64 array.
+        """
+        if not ACCELERATED:
+            return [
+                mask
+                for mask in masks
+                if mask
+                and self._group(mask).check_desirability_at_once(
+                    self.input_vars, self.required_vars
+                )
+            ]
+        if len(masks) == 0 or not self._coverable:
+            return []
+
+        np = _numpy()
+        selection = self._selection(masks)
+        counts = selection @ self._incidence
+        n_equations = selection.sum(axis=1)
+        n_variables = (counts > 0).sum(axis=1)
+        valid = (
+            (n_equations > 0)
+            # Degrees of Freedom Consistency
+            & (n_variables - n_equations == len(self.input_vars))
+            # Required Variables Inclusion
+            & (counts[:, self._required_cols] > 0).all(axis=1)
+            # Solvability
+            & ~(counts[:, self._internal_cols] == 1).any(axis=1)
+            # Unique Constant Equations
+            & ((selection @ self._constants) <= 1).all(axis=1)
+        )
+        return [int(masks[i]) for i in np.flatnonzero(valid)]
+
+    def _selection(self, masks: Sequence[int]) -> Any:
+        """
+        0/1 matrix with one row per mask and one column per equation.
+        """
+        np = _numpy()
+        n_equations = len(self.equations)
+        if n_equations <= MAX_UINT64_EQUATIONS:
+            packed = np.asarray(masks, dtype="<u8").view(np.uint8)
+            n_bytes = 8
+        else:
+            n_bytes = (n_equations + 7) // 8
+            packed = np.frombuffer(
+                b"".join(mask.to_bytes(n_bytes, "little") for mask in masks),
+                dtype=np.uint8,
+            )
+        bits = np.unpackbits(
+            packed.reshape(len(masks), n_bytes), axis=1, bitorder="little"
+        )
+        return bits[:, :n_equations].astype(np.float32)
+
+    def _group(self, mask: int) -> EquationGroup:
+        return EquationGroup(
+            [eq for i, eq in enumerate(self.equations) if mask >> i & 1]
+        )
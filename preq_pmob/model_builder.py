@@ -1,34 +1,160 @@
+import time
 from itertools import combinations, product
-from typing import Dict, List, Set
-
-from .equation import Equation
+from math import comb, prod
+from typing import (
+    Callable,
+    Collection,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    TypeVar,
+    Union,
+)
+
+from .dedup import KeyStore
+from .equation import Equation, number_variables
 from .equation_group import EquationGroup
+from .equation_library import EquationLibrary
+from .kernel import (
+    ACCELERATED,
+    BATCH_SIZE,
+    MAX_UINT64_EQUATIONS,
+    SubsetChecker,
+    combination_masks,
+)
+from .ranking import Cost, equation_count_cost, top_k_models
+
+T = TypeVar("T")
+
+# Number of loop iterations between two cancel, deadline and progress
+# checks
+CHECK_INTERVAL = 1024
+
+METHODS = [
+    "exhaustive",
+    "gradual",
+    "refined_gradual",
+    "two_step_combination",
+    "product_recursive_combination",
+    "sat",
+]
+
+
+class BuildCancelled(Exception):
+    pass
+
+
+class BuildResult(List[EquationGroup]):
+    """
+    Models returned by ModelBuilder.build_models. If the search was
+    stopped by the cancel token or the deadline, `incomplete` is True and
+    the list holds the models found so far.
+    """
+
+    def __init__(
+        self, models: Iterable[EquationGroup], incomplete: bool = False
+    ) -> None:
+        super().__init__(models)
+        self.incomplete: bool = incomplete
+
+
+class CancelToken:
+    """
+    Flag polled by ModelBuilder inside its search loops. Subclasses may
+    override `cancelled` to watch an external signal.
+    """
+
+    def __init__(self) -> None:
+        self._cancelled: bool = False
+
+    def cancel(self) -> None:
+        self._cancelled = True
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled
 
 
 class ModelBuilder:
     def __init__(
         self,
-        equations: List[Equation],
+        equations: Union[List[Equation], EquationLibrary],
         input_vars: List[str],
         output_vars: List[str],
         method: str = "exhaustive",
+        cancel_token: Optional[CancelToken] = None,
+        on_model: Optional[Callable[[EquationGroup], None]] = None,
+        deadline: Optional[float] = None,
+        progress: Optional[Callable[[int, int], None]] = None,
+        memory_limit: Optional[int] = None,
     ) -> None:
-        self.equations: List[Equation] = equations
+        """
+        Args:
+            equations (List[Equation] | EquationLibrary): Equations to
+                combine. With an EquationLibrary, its numbering and index
+                are shared and input and output variable names are
+                normalized like the library's.
+            cancel_token (CancelToken): Stops build_models when cancelled.
+            on_model (Callable): Called with each model when it is found.
+            deadline (float): time.monotonic() value after which
+                build_models stops and returns the models found so far.
+            progress (Callable): Called as progress(done, total) with the
+                number of subsets examined and the estimated number to
+                examine. The estimate grows as the gradual methods enter
+                new product or combination spaces.
+            memory_limit (int): Estimated bytes each set of candidate or
+                pending models found by the gradual methods may hold in
+                memory before it is spilled to a temporary file. None
+                keeps them in memory.
+        """
+        self.library: Optional[EquationLibrary] = None
+        if isinstance(equations, EquationLibrary):
+            self.library = equations
+            input_vars = [equations.normalize(var) for var in input_vars]
+            output_vars = [equations.normalize(var) for var in output_vars]
+            self.variable_bits: Dict[str, int] = equations.variable_bits
+        else:
+            self.variable_bits = number_variables(equations)
+        self.equations: List[Equation] = [
+            eq.with_ordinal(ordinal, self.variable_bits)
+            for ordinal, eq in enumerate(equations)
+        ]
         self.input_vars: Set[str] = set(input_vars)
         self.output_vars: Set[str] = set(output_vars)
         self.required_vars: Set[str] = self.input_vars.union(self.output_vars)
         self.method: str = method
+        self.stats: Dict[str, int] = {
+            "skipped_subset_sizes": 0,
+            "skipped_subsets": 0,
+            "spilled_runs": 0,
+        }
+        self.cancel_token: Optional[CancelToken] = cancel_token
+        self.on_model: Optional[Callable[[EquationGroup], None]] = on_model
+        self.deadline: Optional[float] = deadline
+        self.progress: Optional[Callable[[int, int], None]] = progress
+        self.memory_limit: Optional[int] = memory_limit
+        self._work_done: int = 0
+        self._work_total: int = 0
+        self._found_models: Dict[EquationGroup, None] = {}
 
         if method in [
             "exhaustive",
             "gradual",
             "refined_gradual",
+            "two_step_combination",
+            "product_recursive_combination",
         ]:
             self.var_to_eq_map: Dict[str, Set[Equation]] = (
                 self._create_var_to_eq_map()
             )
 
     def _create_var_to_eq_map(self) -> Dict[str, Set[Equation]]:
+        if self.library is not None:
+            return self.library.var_to_eq_map()
         mapping: Dict[str, Set[Equation]] = {}
         for eq in self.equations:
             for var in eq.variables:
@@ -37,27 +163,258 @@ class ModelBuilder:
                 mapping[var].add(eq)
         return mapping
 
-    def build_models(self) -> List[EquationGroup]:
-        if self.method == "exhaustive":
-            return self.build_models_exhaustive()
-        elif self.method == "gradual":
-            return self.build_models_gradual()
-        elif self.method == "refined_gradual":
-            return self.build_models_refined_gradual()
-        else:
-            raise ValueError("Invalid method.")
+    def _feasible_subset_sizes(
+        self,
+        equations: Collection[Equation],
+        max_size: int,
+        prev_model: EquationGroup = EquationGroup([]),
+    ) -> Set[int]:
+        """
+        Return the subset sizes n (1 <= n <= max_size) for which
+        prev_model extended by n of the given equations can satisfy
+        |vars| - |eqs| = |input_vars|.
+
+        The variable count of such a model is at least the number of
+        required and already selected variables, and at most both the
+        number of variables reachable through prev_model and equations
+        and the sum of the n largest per-equation contributions.
+        """
+        base_vars = prev_model.variables
+        reachable_vars = set(base_vars)
+        for eq in equations:
+            reachable_vars.update(eq.variables)
+        contributions = sorted(
+            (len(eq.variables - base_vars) for eq in equations),
+            reverse=True,
+        )
+        min_vars = len(base_vars | self.required_vars)
+        max_vars = len(base_vars)
+
+        feasible_sizes: Set[int] = set()
+        for n in range(1, max_size + 1):
+            max_vars += contributions[n - 1]
+            n_vars = prev_model.num_equations + n + len(self.input_vars)
+            if min_vars <= n_vars <= min(max_vars, len(reachable_vars)):
+                feasible_sizes.add(n)
+        return feasible_sizes
+
+    def _skip_subset_size(self, n_equations: int, n: int) -> None:
+        self.stats["skipped_subset_sizes"] += 1
+        self.stats["skipped_subsets"] += comb(n_equations, n)
+
+    def _checkpoint(self, n_done: int = 1) -> None:
+        prev_done = self._work_done
+        self._work_done += n_done
+        if prev_done // CHECK_INTERVAL != self._work_done // CHECK_INTERVAL:
+            self._poll()
+
+    def _poll(self) -> None:
+        if self.progress is not None:
+            self.progress(
+                self._work_done, max(self._work_done, self._work_total)
+            )
+        if self.cancel_token is not None and self.cancel_token.cancelled:
+            raise BuildCancelled("cancelled")
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            raise BuildCancelled("deadline exceeded")
+
+    def _checked(self, iterable: Iterable[T]) -> Iterator[T]:
+        for item in iterable:
+            self._checkpoint()
+            yield item
+
+    def _emit(self, model: EquationGroup) -> None:
+        """
+        Record a model that satisfies all requirements and report it to
+        on_model the first time it is found.
+        """
+        if model not in self._found_models:
+            self._found_models[model] = None
+            if self.on_model is not None:
+                self.on_model(model)
+
+    def _new_store(self) -> KeyStore:
+        return KeyStore(
+            (len(self.equations) + 7) // 8, self.memory_limit, self._spilled
+        )
+
+    def _spilled(self) -> None:
+        self.stats["spilled_runs"] += 1
+
+    @staticmethod
+    def _mask_of(model: EquationGroup) -> int:
+        mask = 0
+        for eq in model.equations:
+            mask |= 1 << eq.ordinal
+        return mask
+
+    def _group_from_mask(self, mask: int) -> EquationGroup:
+        equations: List[Equation] = []
+        while mask:
+            low_bit = mask & -mask
+            equations.append(self.equations[low_bit.bit_length() - 1])
+            mask ^= low_bit
+        return EquationGroup(equations)
+
+    def _models_in(self, store: KeyStore) -> Iterator[EquationGroup]:
+        try:
+            for mask in store:
+                yield self._group_from_mask(mask)
+        finally:
+            store.close()
+
+    @staticmethod
+    def _deduplicate(models: List[EquationGroup]) -> List[EquationGroup]:
+        # Keeps the first occurrence of each canonical key
+        return list(dict.fromkeys(models))
+
+    def build_models(self) -> BuildResult:
+        """
+        Build models with the selected method. When the cancel token is
+        set or the deadline passes, the models found so far are returned
+        with `incomplete` set.
+        """
+        self._found_models = {}
+        self._work_done = 0
+        self._work_total = 0
+        try:
+            self._poll()
+            if self.method == "exhaustive":
+                models = self.build_models_exhaustive()
+            elif self.method == "gradual":
+                models = self.build_models_gradual()
+            elif self.method == "refined_gradual":
+                models = self.build_models_refined_gradual()
+            elif self.method == "two_step_combination":
+                models = self.build_models_two_step_combination()
+            elif self.method == "product_recursive_combination":
+                models = self.build_models_product_recursive_combination()
+            elif self.method == "sat":
+                models = self.build_models_sat()
+            else:
+                raise ValueError("Invalid method.")
+        except BuildCancelled:
+            return BuildResult(self._found_models, incomplete=True)
+        if self.progress is not None:
+            self.progress(self._work_done, self._work_done)
+        return BuildResult(models)
+
+    def count_models(self) -> int:
+        """
+        Return the number of models build_models would find, without
+        building any EquationGroup. Raises BuildCancelled when the cancel
+        token is set or the deadline passes.
+        """
+        from .counting import count_models
+
+        self._work_done = 0
+        self._work_total = 0
+        self._poll()
+        return count_models(
+            self.equations,
+            self.input_vars,
+            self.required_vars,
+            self._checkpoint,
+        )
+
+    def top_k(self, k: int, cost: Cost = equation_count_cost) -> BuildResult:
+        """
+        Return the k models with the lowest total cost, cheapest first,
+        without building the full model set.
+
+        Args:
+            k (int): Maximum number of models to return.
+            cost (Callable): Non-negative cost of each equation. The cost
+                of a model is the sum over its equations. Defaults to the
+                number of equations.
+
+        When the cancel token is set or the deadline passes, the cheapest
+        models found so far are returned with `incomplete` set.
+        """
+        self._work_done = 0
+        self._work_total = 0
+        found: List[Tuple[float, List[int]]] = []
+        incomplete = False
+        try:
+            self._poll()
+            top_k_models(
+                self.equations,
+                self.input_vars,
+                self.required_vars,
+                k,
+                cost,
+                self._checkpoint,
+                found,
+                self.variable_bits,
+            )
+        except BuildCancelled:
+            incomplete = True
+        return BuildResult(
+            (
+                EquationGroup([self.equations[i] for i in selected])
+                for _, selected in found
+            ),
+            incomplete,
+        )
 
     def build_models_exhaustive(self) -> List[EquationGroup]:
         output_models: List[EquationGroup] = []
 
-        for n in range(1, len(self.equations) + 1):
-            for eq_combination in combinations(self.equations, n):
+        n_equations = len(self.equations)
+        feasible_sizes = self._feasible_subset_sizes(
+            self.equations, n_equations
+        )
+        n_subsets = sum(comb(n_equations, n) for n in feasible_sizes)
+        self._work_total += n_subsets
+        checker = (
+            SubsetChecker(self.equations, self.input_vars, self.required_vars)
+            if ACCELERATED
+            and BATCH_SIZE <= n_subsets
+            and n_equations <= MAX_UINT64_EQUATIONS
+            else None
+        )
+        for n in range(1, n_equations + 1):
+            if n not in feasible_sizes:
+                self._skip_subset_size(n_equations, n)
+                continue
+            if checker is not None:
+                for masks in combination_masks(n_equations, n):
+                    self._checkpoint(len(masks))
+                    for mask in checker.check_masks(masks):
+                        eq_group = self._group_from_mask(mask)
+                        self._emit(eq_group)
+                        output_models.append(eq_group)
+                continue
+            for eq_combination in self._checked(
+                combinations(self.equations, n)
+            ):
                 eq_group = EquationGroup(list(eq_combination))
                 if eq_group.check_desirability_at_once(
                     self.input_vars, self.required_vars
                 ):
+                    self._emit(eq_group)
                     output_models.append(eq_group)
-        return output_models
+        return self._deduplicate(output_models)
+
+    def build_models_sat(self) -> List[EquationGroup]:
+        """
+        Enumerate the same models as build_models_exhaustive with a SAT
+        encoding of the four predefined requirements.
+        """
+        from .sat import enumerate_models
+
+        output_models: List[EquationGroup] = []
+
+        for selected in enumerate_models(
+            self.equations,
+            self.input_vars,
+            self.required_vars,
+            self._checkpoint,
+        ):
+            eq_group = EquationGroup([self.equations[i] for i in selected])
+            self._emit(eq_group)
+            output_models.append(eq_group)
+        return self._deduplicate(output_models)
 
     def build_models_gradual(self) -> List[EquationGroup]:
         output_models: List[EquationGroup] = []
@@ -82,7 +439,7 @@ class ModelBuilder:
                 )
                 output_models.extend(new_candidate_models)
 
-        return output_models
+        return self._deduplicate(output_models)
 
     def build_models_refined_gradual(self) -> List[EquationGroup]:
         output_models: List[EquationGroup] = []
@@ -110,7 +467,7 @@ class ModelBuilder:
             )
             output_models.extend(new_candidate_models)
 
-        return output_models
+        return self._deduplicate(output_models)
 
     def identify_redundant_variables(
         self, pending_model: EquationGroup
@@ -190,33 +547,41 @@ class ModelBuilder:
                 equations that are already selected.
 
         Returns:
-            Set[tuple]: A set of candidate models that include vars.
+            tuple: Iterators over the candidate models that include vars
+                and over the pending models, each model once.
         """
-        candidate_models: Set[EquationGroup] = set()
-        pending_models: Set[EquationGroup] = set()
-
-        pending_eq_groups = set(
-            tuple(set(eqs))
-            for eqs in product(*[var_to_eq_map[v] for v in variables])
-        )
-
-        for pending_eq_group in pending_eq_groups:
-            eq_group = EquationGroup(
-                list(
-                    set(prev_pending_model.equations).union(
-                        set(pending_eq_group)
-                    )
-                )
-            )
-
+        candidate_models = self._new_store()
+        pending_models = self._new_store()
+
+        eq_sets = [var_to_eq_map.get(v, set()) for v in variables]
+        self._work_total += prod(len(eqs) for eqs in eq_sets)
+        prev_mask = self._mask_of(prev_pending_model)
+        pending_masks = self._new_store()
+        for eqs in self._checked(product(*eq_sets)):
+            mask = prev_mask
+            for eq in eqs:
+                mask |= 1 << eq.ordinal
+            pending_masks.add(mask)
+
+        for mask in pending_masks:
+            self._work_total += 1
+            self._checkpoint()
+            if not mask:
+                continue
+            eq_group = self._group_from_mask(mask)
             if eq_group.check_desirability_at_once(
                 self.input_vars, self.required_vars
             ):
-                candidate_models.add(eq_group)
+                self._emit(eq_group)
+                candidate_models.add(mask)
             elif eq_group.is_not_overdetermined():
-                pending_models.add(eq_group)
+                pending_models.add(mask)
+        pending_masks.close()
 
-        return candidate_models, pending_models
+        return (
+            self._models_in(candidate_models),
+            self._models_in(pending_models),
+        )
 
     def build_candidate_models_by_combination(
         self,
@@ -238,30 +603,49 @@ class ModelBuilder:
                 equations that are already selected.
 
         Returns:
-            Set[tuple]: A set of candidate models that include vars.
+            tuple: Iterators over the candidate models that include vars
+                and over the pending models, each model once.
         """
-        candidate_models: Set[EquationGroup] = set()
-        pending_models: Set[EquationGroup] = set()
+        candidate_models = self._new_store()
+        pending_models = self._new_store()
 
         equations: Set[Equation] = {
             eq for v in variables for eq in var_to_eq_map.get(v, set())
         }
 
-        for n in range(1, min(len(equations), len(variables)) + 1):
-            for eq_combination in combinations(equations, n):
+        max_size = min(len(equations), len(variables))
+        feasible_sizes = self._feasible_subset_sizes(
+            equations, max_size, prev_pending_models
+        )
+        self._work_total += sum(
+            comb(len(equations), n)
+            for n in range(1, max_size + 1)
+            if n in feasible_sizes or evaluate_pending_models
+        )
+        for n in range(1, max_size + 1):
+            # Sizes outside the DOF window can still yield pending models
+            is_feasible = n in feasible_sizes
+            if not (is_feasible or evaluate_pending_models):
+                self._skip_subset_size(len(equations), n)
+                continue
+            for eq_combination in self._checked(combinations(equations, n)):
                 eq_group = EquationGroup(
                     prev_pending_models.equations + list(eq_combination)
                 )
-                if eq_group.check_desirability_at_once(
+                if is_feasible and eq_group.check_desirability_at_once(
                     self.input_vars, self.required_vars
                 ):
-                    candidate_models.add(eq_group)
+                    self._emit(eq_group)
+                    candidate_models.add(self._mask_of(eq_group))
                 elif not evaluate_pending_models:
                     continue
                 elif eq_group.has_required_variables(variables):
-                    pending_models.add(eq_group)
+                    pending_models.add(self._mask_of(eq_group))
 
-        return candidate_models, pending_models
+        return (
+            self._models_in(candidate_models),
+            self._models_in(pending_models),
+        )
 
     def build_models_two_step_combination(self) -> List[EquationGroup]:
         output_models: List[EquationGroup] = []
@@ -289,7 +673,7 @@ class ModelBuilder:
             )
             output_models.extend(new_candidate_models)
 
-        return output_models
+        return self._deduplicate(output_models)
 
     def build_models_product_recursive_combination(
         self,
@@ -304,29 +688,38 @@ class ModelBuilder:
         )
         output_models.extend(candidate_models)
 
-        processed_models: Set[EquationGroup] = set()
-        model_queue = list(pending_models)
-
-        while model_queue:
-            pending_model = model_queue.pop(0)
-            if pending_model in processed_models:
-                continue
-            processed_models.add(pending_model)
-            redundant_var_to_eq_map = self.identify_redundant_variables(
-                pending_model
-            )
-            new_candidate_models, new_pending_models = (
-                self.build_candidate_models_by_combination(
-                    set(redundant_var_to_eq_map.keys()),
-                    redundant_var_to_eq_map,
-                    pending_model,
-                )
-            )
-            output_models.extend(new_candidate_models)
-            new_models = {
-                model
-                for model in new_pending_models
-                if model not in processed_models
-            }
-            model_queue.extend(new_models)
-        return output_models
+        # Pending models are queued as keys by size and expanded smallest
+        # first. Expansions only add equations, so every model of a size
+        # is queued before that size is expanded, and the stores expand
+        # each model once.
+        queued: Dict[int, KeyStore] = {}
+
+        def enqueue(model: EquationGroup) -> None:
+            if model.num_equations not in queued:
+                queued[model.num_equations] = self._new_store()
+            queued[model.num_equations].add(self._mask_of(model))
+
+        try:
+            for model in pending_models:
+                enqueue(model)
+            while queued:
+                store = queued.pop(min(queued))
+                for pending_model in self._models_in(store):
+                    self._checkpoint()
+                    redundant_var_to_eq_map = (
+                        self.identify_redundant_variables(pending_model)
+                    )
+                    new_candidate_models, new_pending_models = (
+                        self.build_candidate_models_by_combination(
+                            set(redundant_var_to_eq_map.keys()),
+                            redundant_var_to_eq_map,
+                            pending_model,
+                        )
+                    )
+                    output_models.extend(new_candidate_models)
+                    for model in new_pending_models:
+                        enqueue(model)
+        finally:
+            for store in queued.values():
+                store.close()
+        return self._deduplicate(output_models)
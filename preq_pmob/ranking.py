@@ -0,0 +1,182 @@
+"""
+Search for the k cheapest models under an additive per-equation cost.
+
+With integer costs, models are enumerated by the SAT engine. Once k models
+are known, each further model must cost less than the current k-th best,
+so the search ends when no cheaper model exists. Other costs use a
+branch-and-bound search whose bound is seeded by the first k models found
+by the SAT engine.
+
+In the branch-and-bound search, equations are tried in ascending cost
+order, so a branch is abandoned as soon as its next equation cannot beat
+the current k-th best model. Other branches are pruned when no remaining
+equation can cover a missing required variable or a used internal
+variable, when the DOF target is out of reach, or when the cheapest
+completion of those variables cannot beat the k-th best. Variable sets
+are handled as the equations' bitmasks.
+"""
+
+from bisect import insort
+from itertools import islice
+from typing import Callable, List, Mapping, Optional, Sequence, Set, Tuple
+
+from .equation import Equation, number_variables, variable_mask
+
+Checkpoint = Callable[[], None]
+Cost = Callable[[Equation], float]
+
+
+def equation_count_cost(eq: Equation) -> float:
+    return 1.0
+
+
+def constant_equation_cost(eq: Equation) -> float:
+    return 1.0 if len(eq.variables) == 1 else 0.0
+
+
+def top_k_models(
+    equations: Sequence[Equation],
+    input_vars: Set[str],
+    required_vars: Set[str],
+    k: int,
+    cost: Cost = equation_count_cost,
+    checkpoint: Optional[Checkpoint] = None,
+    found: Optional[List[Tuple[float, List[int]]]] = None,
+    variable_bits: Optional[Mapping[str, int]] = None,
+) -> List[Tuple[float, List[int]]]:
+    """
+    Return up to k (cost, equation indices) pairs of models that satisfy
+    the four predefined requirements, cheapest first. Which of several
+    models of equal cost are kept is unspecified. Costs must be
+    non-negative. If found is given, it holds the best pairs found so far
+    during the search, so they remain available when checkpoint raises.
+    If variable_bits is given, the equations' masks are in that
+    numbering; otherwise the variables are numbered here.
+    """
+    costs = [cost(eq) for eq in equations]
+    if any(c < 0 for c in costs):
+        raise ValueError("Equation costs must be non-negative.")
+    if k <= 0:
+        return []
+
+    # (cost, number of equations, sorted indices), cheapest first
+    best: List[Tuple[float, int, Tuple[int, ...]]] = []
+
+    def record(indices: Sequence[int]) -> None:
+        entry = (
+            sum(costs[i] for i in indices),
+            len(indices),
+            tuple(sorted(indices)),
+        )
+        if entry in best:
+            return
+        insort(best, entry)
+        del best[k:]
+        if found is not None:
+            found[:] = [(t, list(i)) for t, _, i in best]
+
+    from .sat import enumerate_cheaper_models, enumerate_models
+
+    if all(float(c).is_integer() for c in costs):
+        for indices in enumerate_cheaper_models(
+            equations,
+            input_vars,
+            required_vars,
+            [int(c) for c in costs],
+            lambda: int(best[-1][0]) if len(best) == k else None,
+            checkpoint,
+        ):
+            record(indices)
+        return [(total, list(indices)) for total, _, indices in best]
+
+    # The first k models found by the SAT engine bound the search from
+    # the start
+    for indices in islice(
+        enumerate_models(equations, input_vars, required_vars, checkpoint),
+        k,
+    ):
+        record(indices)
+    if len(best) < k:
+        # These are all the models
+        return [(total, list(indices)) for total, _, indices in best]
+
+    if variable_bits is None:
+        variable_bits = number_variables(equations)
+        eq_masks = [
+            variable_mask(eq.variables, variable_bits) for eq in equations
+        ]
+    else:
+        eq_masks = [eq.mask for eq in equations]
+    if not required_vars <= variable_bits.keys():
+        return []
+    required_mask = variable_mask(required_vars, variable_bits)
+
+    order = sorted(range(len(equations)), key=lambda i: (costs[i], i))
+    masks = [eq_masks[i] for i in order]
+    sorted_costs = [costs[i] for i in order]
+    n = len(order)
+    suffix_masks = [0] * (n + 1)
+    for pos in range(n - 1, -1, -1):
+        suffix_masks[pos] = suffix_masks[pos + 1] | masks[pos]
+    target_dof = len(input_vars)
+
+    selected: List[int] = []
+
+    def lower_bound(start: int, seen: int, once: int) -> Optional[float]:
+        """
+        Cheapest cost any extension from start must add, or None if no
+        extension can become a model.
+        """
+        needed = (required_mask & ~seen) | (once & ~required_mask)
+        if needed & ~suffix_masks[start]:
+            return None
+        dof = seen.bit_count() - len(selected)
+        reachable_vars = (suffix_masks[start] & ~seen).bit_count()
+        if not dof - (n - start) <= target_dof <= dof + reachable_vars:
+            return None
+        extra = 0.0
+        for pos in range(start, n):
+            if not needed:
+                break
+            if masks[pos] & needed:
+                # Costs are ascending, so the last covering cost is the max
+                extra = sorted_costs[pos]
+                needed &= ~masks[pos]
+        return extra
+
+    def search(
+        start: int, seen: int, once: int, constants: int, total: float
+    ) -> None:
+        for pos in range(start, n):
+            if checkpoint is not None:
+                checkpoint()
+            new_total = total + sorted_costs[pos]
+            if len(best) == k and new_total >= best[-1][0]:
+                break
+            mask = masks[pos]
+            new_constants = constants
+            if mask.bit_count() == 1:
+                # Unique Constant Equations
+                if mask & constants:
+                    continue
+                new_constants |= mask
+            new_seen = seen | mask
+            new_once = (once & ~mask) | (mask & ~seen)
+            selected.append(order[pos])
+
+            if (
+                not required_mask & ~new_seen
+                and new_seen.bit_count() - len(selected) == target_dof
+                and not new_once & ~required_mask
+            ):
+                record(selected)
+
+            extra = lower_bound(pos + 1, new_seen, new_once)
+            if extra is not None and (
+                len(best) < k or new_total + extra < best[-1][0]
+            ):
+                search(pos + 1, new_seen, new_once, new_constants, new_total)
+            selected.pop()
+
+    search(0, 0, 0, 0, 0.0)
+    return [(total, list(indices)) for total, _, indices in best]
@@ -0,0 +1,125 @@
+"""
+Compact storage and comparison of built models.
+
+A ModelSet holds an equation table (the distinct equation strings of a
+case, in case order) and one packed bit row per model, where bit i is set
+if the model contains equations[i]. Rows are saved as a NumPy .npz file,
+and model sets over the same table are compared with vectorized set
+operations on the rows. to_json gives the equation-string view used by
+earlier result files.
+"""
+
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Sequence, Union
+
+import numpy as np
+
+from .equation_group import EquationGroup
+
+
+class ModelSet:
+    def __init__(self, equations: Sequence[str], rows: Any) -> None:
+        """
+        Args:
+            equations (Sequence[str]): Equation table.
+            rows (np.ndarray): uint8 array of shape
+                (n_models, ceil(len(equations) / 8)) with the models'
+                equation bits in little-endian bit order.
+        """
+        self.equations: List[str] = list(equations)
+        self.rows: Any = rows
+
+    @staticmethod
+    def equation_table(equations: Iterable[str]) -> List[str]:
+        return list(dict.fromkeys(equations))
+
+    @classmethod
+    def from_equation_lists(
+        cls, models: Iterable[Iterable[str]], equations: Sequence[str]
+    ) -> "ModelSet":
+        """
+        Encode models given as equation strings. Equal strings denote the
+        same equation. Raises ValueError for an equation missing from the
+        table.
+        """
+        index = {eq_str: i for i, eq_str in enumerate(equations)}
+        n_bytes = (len(equations) + 7) // 8
+        masks: List[bytes] = []
+        for model in models:
+            mask = 0
+            for eq_str in model:
+                if eq_str not in index:
+                    raise ValueError(
+                        f"Equation not in the equation table: {eq_str!r}"
+                    )
+                mask |= 1 << index[eq_str]
+            masks.append(mask.to_bytes(n_bytes, "little"))
+        rows = np.frombuffer(b"".join(masks), dtype=np.uint8)
+        return cls(equations, rows.reshape(len(masks), n_bytes))
+
+    @classmethod
+    def from_groups(
+        cls, models: Iterable[EquationGroup], equations: Sequence[str]
+    ) -> "ModelSet":
+        return cls.from_equation_lists(
+            ((eq.equation_str for eq in model.equations) for model in models),
+            equations,
+        )
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def to_json(self) -> List[List[str]]:
+        bits = np.unpackbits(self.rows, axis=1, bitorder="little")
+        return [
+            [self.equations[i] for i in np.flatnonzero(row)] for row in bits
+        ]
+
+    def save(self, path: Union[str, Path]) -> None:
+        np.savez_compressed(
+            path, equations=np.array(self.equations), models=self.rows
+        )
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "ModelSet":
+        with np.load(path) as data:
+            return cls(data["equations"].tolist(), data["models"])
+
+    def _unique_rows(self) -> Any:
+        n_bytes = self.rows.shape[1]
+        return np.unique(
+            np.ascontiguousarray(self.rows)
+            .view(np.dtype((np.void, n_bytes)))
+            .ravel()
+        )
+
+    def compare(self, expected: "ModelSet") -> Dict[str, Any]:
+        """
+        Compare the distinct models of this set with the expected ones.
+        """
+        if self.equations != expected.equations:
+            raise ValueError("Model sets use different equation tables.")
+        built_rows = self._unique_rows()
+        expected_rows = expected._unique_rows()
+        n_expected = len(expected_rows)
+        n_built = len(built_rows)
+        n_correct = len(
+            np.intersect1d(built_rows, expected_rows, assume_unique=True)
+        )
+
+        recall = n_correct / n_expected if n_expected > 0 else 0
+        precision = n_correct / n_built if n_built > 0 else 0
+        f1 = (
+            2 * (recall * precision) / (recall + precision)
+            if recall + precision > 0
+            else 0
+        )
+        return {
+            "success": n_correct == n_built == n_expected,
+            "n_expected": n_expected,
+            "n_built": n_built,
+            "n_correct": n_correct,
+            "recall": recall,
+            "precision": precision,
+            "f1": f1,
+        }
@@ -0,0 +1,478 @@
+"""
+Dependency-free SAT engine for enumerating models.
+
+Each equation e gets a Boolean selection variable x_e and each variable v
+a Boolean y_v that is true iff a selected equation contains v. The four
+predefined requirements become:
+
+1. Required Variables Inclusion: for each required v, OR(x_e : v in e).
+2. Degrees of Freedom Consistency: sum(y_v) - sum(x_e) = |input_vars|,
+   encoded with two totalizers whose unary outputs are tied together.
+3. Solvability: for each internal v and each e containing v,
+   x_e => OR(x_f : v in f, f != e).
+4. Unique Constant Equations: at most one selected single-variable
+   equation per variable.
+
+Models are enumerated by adding a blocking clause over the x_e after each
+solution. For ranked search, a counter over the x_e, with each literal
+repeated as often as its integer cost, bounds the total cost of the
+remaining models.
+"""
+
+import heapq
+from typing import (
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
+
+from .equation import Equation
+
+# Literals are non-zero ints as in DIMACS: v for x_v, -v for not x_v.
+# Internally, variable v (1-based) maps to literals 2 * (v - 1) (positive)
+# and 2 * (v - 1) + 1 (negative).
+_TRUE = 1
+_FALSE = 0
+_UNASSIGNED = -1
+
+Checkpoint = Callable[[], None]
+
+
+def _internal(lit: int) -> int:
+    return 2 * (lit - 1) if lit > 0 else 2 * (-lit - 1) + 1
+
+
+class SatSolver:
+    """
+    Minimal incremental CDCL solver: two watched literals, first-UIP
+    clause learning, VSIDS-style activities with phase saving and Luby
+    restarts. Clauses may be added between calls to solve().
+    """
+
+    def __init__(self) -> None:
+        self.n_vars: int = 0
+        self.clauses: List[List[int]] = []
+        self._watches: List[List[int]] = []
+        self._assigns: List[int] = []
+        self._level: List[int] = []
+        self._reason: List[int] = []
+        self._phase: List[int] = []
+        self._activity: List[float] = []
+        self._heap: List[Tuple[float, int]] = []
+        self._trail: List[int] = []
+        self._trail_lim: List[int] = []
+        self._qhead: int = 0
+        self._var_inc: float = 1.0
+        self._unsat: bool = False
+
+    def new_var(self) -> int:
+        self.n_vars += 1
+        self._watches.extend(([], []))
+        self._assigns.append(_UNASSIGNED)
+        self._level.append(0)
+        self._reason.append(-1)
+        self._phase.append(_FALSE)
+        self._activity.append(0.0)
+        heapq.heappush(self._heap, (0.0, self.n_vars - 1))
+        return self.n_vars
+
+    def _value(self, lit: int) -> int:
+        value = self._assigns[lit >> 1]
+        if value == _UNASSIGNED:
+            return _UNASSIGNED
+        return value ^ (lit & 1)
+
+    def add_clause(self, lits: Sequence[int]) -> None:
+        if self._unsat:
+            return
+        self._cancel_until(0)
+        clause: List[int] = []
+        for lit in set(_internal(lit) for lit in lits):
+            value = self._value(lit)
+            if value == _TRUE or lit ^ 1 in clause:
+                return
+            if value == _UNASSIGNED:
+                clause.append(lit)
+        if not clause:
+            self._unsat = True
+        elif len(clause) == 1:
+            self._enqueue(clause[0], -1)
+            if self._propagate() >= 0:
+                self._unsat = True
+        else:
+            self._attach(clause)
+
+    def _attach(self, clause: List[int]) -> int:
+        index = len(self.clauses)
+        self.clauses.append(clause)
+        self._watches[clause[0]].append(index)
+        self._watches[clause[1]].append(index)
+        return index
+
+    def _enqueue(self, lit: int, reason: int) -> None:
+        var = lit >> 1
+        self._assigns[var] = _TRUE ^ (lit & 1)
+        self._level[var] = len(self._trail_lim)
+        self._reason[var] = reason
+        self._trail.append(lit)
+
+    def _propagate(self) -> int:
+        """
+        Unit propagation. Returns the index of a conflicting clause or -1.
+        The implied literal of a reason clause is kept at position 0.
+        """
+        while self._qhead < len(self._trail):
+            false_lit = self._trail[self._qhead] ^ 1
+            self._qhead += 1
+            watchers = self._watches[false_lit]
+            i = j = 0
+            n_watchers = len(watchers)
+            while i < n_watchers:
+                index = watchers[i]
+                i += 1
+                clause = self.clauses[index]
+                if clause[0] == false_lit:
+                    clause[0], clause[1] = clause[1], false_lit
+                first = clause[0]
+                if self._value(first) == _TRUE:
+                    watchers[j] = index
+                    j += 1
+                    continue
+                for k in range(2, len(clause)):
+                    if self._value(clause[k]) != _FALSE:
+                        clause[1], clause[k] = clause[k], false_lit
+                        self._watches[clause[1]].append(index)
+                        break
+                else:
+                    watchers[j] = index
+                    j += 1
+                    if self._value(first) == _FALSE:
+                        while i < n_watchers:
+                            watchers[j] = watchers[i]
+                            j += 1
+                            i += 1
+                        del watchers[j:]
+                        return index
+                    self._enqueue(first, index)
+            del watchers[j:]
+        return -1
+
+    def _bump(self, var: int) -> None:
+        self._activity[var] += self._var_inc
+        if self._activity[var] > 1e100:
+            self._activity = [a * 1e-100 for a in self._activity]
+            self._var_inc *= 1e-100
+            self._heap = [(-a, v) for v, a in enumerate(self._activity)]
+            heapq.heapify(self._heap)
+        else:
+            heapq.heappush(self._heap, (-self._activity[var], var))
+
+    def _analyze(self, conflict: int) -> List[int]:
+        """
+        Derive the first-UIP clause of a conflict. Its asserting literal
+        is at position 0 and a literal of the backjump level at position 1.
+        """
+        learnt = [0]
+        seen: Set[int] = set()
+        current_level = len(self._trail_lim)
+        counter = 0
+        lit = -1
+        index = len(self._trail) - 1
+        while True:
+            clause = self.clauses[conflict]
+            for q in clause if lit == -1 else clause[1:]:
+                var = q >> 1
+                if var not in seen and self._level[var] > 0:
+                    seen.add(var)
+                    self._bump(var)
+                    if self._level[var] >= current_level:
+                        counter += 1
+                    else:
+                        learnt.append(q)
+            while self._trail[index] >> 1 not in seen:
+                index -= 1
+            lit = self._trail[index]
+            index -= 1
+            conflict = self._reason[lit >> 1]
+            seen.discard(lit >> 1)
+            counter -= 1
+            if counter == 0:
+                break
+        learnt[0] = lit ^ 1
+        if len(learnt) > 1:
+            top = max(
+                range(1, len(learnt)),
+                key=lambda i: self._level[learnt[i] >> 1],
+            )
+            learnt[1], learnt[top] = learnt[top], learnt[1]
+        return learnt
+
+    def _cancel_until(self, level: int) -> None:
+        if len(self._trail_lim) <= level:
+            return
+        for lit in self._trail[self._trail_lim[level] :]:
+            var = lit >> 1
+            self._phase[var] = self._assigns[var]
+            self._assigns[var] = _UNASSIGNED
+            self._reason[var] = -1
+            heapq.heappush(self._heap, (-self._activity[var], var))
+        del self._trail[self._trail_lim[level] :]
+        del self._trail_lim[level:]
+        self._qhead = len(self._trail)
+
+    def _pick_branch_var(self) -> int:
+        while self._heap:
+            _, var = heapq.heappop(self._heap)
+            if self._assigns[var] == _UNASSIGNED:
+                return var
+        for var in range(self.n_vars):
+            if self._assigns[var] == _UNASSIGNED:
+                return var
+        return -1
+
+    @staticmethod
+    def _luby(i: int) -> int:
+        size, seq = 1, 0
+        while size < i + 1:
+            seq += 1
+            size = 2 * size + 1
+        while size - 1 != i:
+            size = (size - 1) >> 1
+            seq -= 1
+            i %= size
+        return 1 << seq
+
+    def solve(
+        self, checkpoint: Optional[Checkpoint] = None
+    ) -> Optional[List[bool]]:
+        """
+        Return a satisfying assignment indexed by variable - 1, or None if
+        the clauses are unsatisfiable. checkpoint is called once per
+        decision and conflict.
+        """
+        if self._unsat:
+            return None
+        self._cancel_until(0)
+        n_restarts = 0
+        conflicts_left = 100 * self._luby(n_restarts)
+        while True:
+            if checkpoint is not None:
+                checkpoint()
+            conflict = self._propagate()
+            if conflict >= 0:
+                if not self._trail_lim:
+                    self._unsat = True
+                    return None
+                learnt = self._analyze(conflict)
+                backjump_level = (
+                    self._level[learnt[1] >> 1] if len(learnt) > 1 else 0
+                )
+                self._cancel_until(backjump_level)
+                if len(learnt) == 1:
+                    self._enqueue(learnt[0], -1)
+                else:
+                    self._enqueue(learnt[0], self._attach(learnt))
+                self._var_inc /= 0.95
+                conflicts_left -= 1
+                if conflicts_left == 0:
+                    n_restarts += 1
+                    conflicts_left = 100 * self._luby(n_restarts)
+                    self._cancel_until(0)
+                continue
+            var = self._pick_branch_var()
+            if var < 0:
+                return [value == _TRUE for value in self._assigns]
+            self._trail_lim.append(len(self._trail))
+            self._enqueue(2 * var + (self._phase[var] == _FALSE), -1)
+
+
+def _totalizer(solver: SatSolver, lits: Sequence[int]) -> List[int]:
+    """
+    Unary counter over lits: the k-th returned literal (0-based) is true
+    iff at least k + 1 of lits are true.
+    """
+    if len(lits) <= 1:
+        return list(lits)
+    mid = len(lits) // 2
+    left = _totalizer(solver, lits[:mid])
+    right = _totalizer(solver, lits[mid:])
+    out = [solver.new_var() for _ in range(len(left) + len(right))]
+    for i in range(len(left) + 1):
+        for j in range(len(right) + 1):
+            if i + j > 0:
+                clause = [out[i + j - 1]]
+                if i > 0:
+                    clause.append(-left[i - 1])
+                if j > 0:
+                    clause.append(-right[j - 1])
+                solver.add_clause(clause)
+            if i + j < len(out):
+                clause = [-out[i + j]]
+                if i < len(left):
+                    clause.append(left[i])
+                if j < len(right):
+                    clause.append(right[j])
+                solver.add_clause(clause)
+    return out
+
+
+def _at_least(solver: SatSolver, lits: Sequence[int], limit: int) -> List[int]:
+    """
+    Unary counter over lits truncated at limit outputs: the k-th returned
+    literal (0-based) is true if at least k + 1 of lits are true. Only
+    this direction is encoded, which is enough for upper bounds.
+    """
+    if len(lits) <= 1:
+        return list(lits[:limit])
+    mid = len(lits) // 2
+    left = _at_least(solver, lits[:mid], limit)
+    right = _at_least(solver, lits[mid:], limit)
+    out = [solver.new_var() for _ in range(min(len(left) + len(right), limit))]
+    for i in range(len(left) + 1):
+        for j in range(min(len(right), limit - i) + 1):
+            if i + j > 0:
+                clause = [out[i + j - 1]]
+                if i > 0:
+                    clause.append(-left[i - 1])
+                if j > 0:
+                    clause.append(-right[j - 1])
+                solver.add_clause(clause)
+    return out
+
+
+def _encode(
+    equations: Sequence[Equation],
+    input_vars: Set[str],
+    required_vars: Set[str],
+) -> Tuple[SatSolver, List[int]]:
+    """
+    Return a solver whose solutions are the models, and the selection
+    literal x_e of each equation.
+    """
+    solver = SatSolver()
+    x = [solver.new_var() for _ in equations]
+    var_to_eqs: Dict[str, List[int]] = {}
+    for i, eq in enumerate(equations):
+        for var in eq.variables:
+            var_to_eqs.setdefault(var, []).append(i)
+    y = {var: solver.new_var() for var in var_to_eqs}
+
+    # y_v <=> OR(x_e : v in e)
+    for var, eqs in var_to_eqs.items():
+        for i in eqs:
+            solver.add_clause([-x[i], y[var]])
+        solver.add_clause([-y[var]] + [x[i] for i in eqs])
+
+    # 1. Required Variables Inclusion
+    for var in required_vars:
+        solver.add_clause([x[i] for i in var_to_eqs.get(var, [])])
+
+    # 2. Degrees of Freedom Consistency: Y = X + k over unary counters
+    k = len(input_vars)
+    count_y = _totalizer(solver, list(y.values()))
+    count_x = _totalizer(solver, x)
+    if k > 0:
+        solver.add_clause([count_y[k - 1]] if k <= len(count_y) else [])
+    for j in range(1, len(count_x) + 1):
+        y_at_least = count_y[j + k - 1] if j + k <= len(count_y) else None
+        # X >= j => Y >= j + k
+        solver.add_clause(
+            [-count_x[j - 1]]
+            + ([y_at_least] if y_at_least is not None else [])
+        )
+        # Y >= j + k => X >= j
+        if y_at_least is not None:
+            solver.add_clause([-y_at_least, count_x[j - 1]])
+    if len(count_x) + k < len(count_y):
+        solver.add_clause([-count_y[len(count_x) + k]])
+
+    # 3. Solvability
+    for var, eqs in var_to_eqs.items():
+        if var in required_vars:
+            continue
+        for i in eqs:
+            solver.add_clause([-x[i]] + [x[f] for f in eqs if f != i])
+
+    # 4. Unique Constant Equations
+    constants: Dict[str, List[int]] = {}
+    for i, eq in enumerate(equations):
+        if len(eq.variables) == 1:
+            constants.setdefault(next(iter(eq.variables)), []).append(i)
+    for eqs in constants.values():
+        for a in range(len(eqs)):
+            for b in range(a + 1, len(eqs)):
+                solver.add_clause([-x[eqs[a]], -x[eqs[b]]])
+
+    # Models are non-empty
+    solver.add_clause(x)
+    return solver, x
+
+
+def _solutions(
+    solver: SatSolver,
+    x: List[int],
+    checkpoint: Optional[Checkpoint] = None,
+) -> Iterator[List[int]]:
+    while True:
+        assignment = solver.solve(checkpoint)
+        if assignment is None:
+            return
+        selected = [i for i in range(len(x)) if assignment[x[i] - 1]]
+        yield selected
+        solver.add_clause(
+            [-x[i] if assignment[x[i] - 1] else x[i] for i in range(len(x))]
+        )
+
+
+def enumerate_models(
+    equations: Sequence[Equation],
+    input_vars: Set[str],
+    required_vars: Set[str],
+    checkpoint: Optional[Checkpoint] = None,
+) -> Iterator[List[int]]:
+    """
+    Yield the indices of each subset of equations that satisfies the four
+    predefined requirements, one subset at a time.
+    """
+    solver, x = _encode(equations, input_vars, required_vars)
+    yield from _solutions(solver, x, checkpoint)
+
+
+def enumerate_cheaper_models(
+    equations: Sequence[Equation],
+    input_vars: Set[str],
+    required_vars: Set[str],
+    costs: Sequence[int],
+    bound: Callable[[], Optional[int]],
+    checkpoint: Optional[Checkpoint] = None,
+) -> Iterator[List[int]]:
+    """
+    Like enumerate_models, but each model yielded costs less than the
+    value of bound() when it is requested (None for no bound). The cost
+    of a model is the sum of the non-negative integer costs of its
+    equations. The bound may only decrease.
+    """
+    solver, x = _encode(equations, input_vars, required_vars)
+    weighted = [x[i] for i, cost in enumerate(costs) for _ in range(cost)]
+    # Built at the first bound, which is the largest
+    count: Optional[List[int]] = None
+    solutions = _solutions(solver, x, checkpoint)
+    while True:
+        max_cost = bound()
+        if max_cost is not None:
+            if max_cost <= 0:
+                return
+            if count is None:
+                count = _at_least(solver, weighted, max_cost)
+            if max_cost <= len(count):
+                # Total cost of at most max_cost - 1
+                solver.add_clause([-count[max_cost - 1]])
+        selected = next(solutions, None)
+        if selected is None:
+            return
+        yield selected
@@ -0,0 +1,334 @@
+"""
+Asyncio front end for serving model building requests.
+
+Searches run in a process pool shared by all requests of a
+ModelBuildingService. Identical concurrent requests (same library
+fingerprint, inputs, outputs and method) share a single search, models
+are streamed back as they are found, and a search whose subscribers
+have all gone away is cancelled inside the worker.
+"""
+
+import asyncio
+import hashlib
+import multiprocessing
+import queue
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from multiprocessing.context import BaseContext
+from multiprocessing.managers import SyncManager
+from typing import (
+    Any,
+    AsyncGenerator,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+from weakref import WeakKeyDictionary
+
+from .equation import Equation
+from .equation_group import EquationGroup
+from .equation_library import EquationLibrary
+from .model_builder import BuildCancelled, CancelToken, ModelBuilder
+
+RequestKey = Tuple[str, Tuple[str, ...], Tuple[str, ...], str]
+Ordinals = Tuple[int, ...]
+
+# Seconds between two looks at the cancel event, which also bounds how
+# long a found model is buffered in the worker before being streamed
+POLL_INTERVAL = 0.05
+
+
+def library_fingerprint(equations: Sequence[Equation]) -> str:
+    """
+    Digest of the equation strings and variables, in list order.
+    """
+    digest = hashlib.sha256()
+    for eq in equations:
+        digest.update(eq.equation_str.encode())
+        digest.update(b"\0")
+        digest.update("\0".join(sorted(eq.variables)).encode())
+        digest.update(b"\1")
+    return digest.hexdigest()
+
+
+class _WorkerChannel(CancelToken):
+    """
+    Worker-side end of a request: watches the shared cancel event and
+    sends found models back in batches.
+    """
+
+    def __init__(self, cancel_event: Any, result_queue: Any) -> None:
+        super().__init__()
+        self._cancel_event = cancel_event
+        self._result_queue = result_queue
+        self._buffer: List[Ordinals] = []
+        self._last_poll: float = time.monotonic()
+
+    @property
+    def cancelled(self) -> bool:
+        now = time.monotonic()
+        if now - self._last_poll >= POLL_INTERVAL:
+            self._last_poll = now
+            self.flush()
+            if self._cancel_event.is_set():
+                self.cancel()
+        return super().cancelled
+
+    def put(self, model: EquationGroup) -> None:
+        self._buffer.append(model.ordinals)
+        if time.monotonic() - self._last_poll >= POLL_INTERVAL:
+            _ = self.cancelled
+
+    def flush(self) -> None:
+        if self._buffer:
+            self._result_queue.put(self._buffer)
+            self._buffer = []
+
+
+def _run_build(
+    equations: Union[List[Equation], EquationLibrary],
+    input_vars: List[str],
+    output_vars: List[str],
+    method: str,
+    cancel_event: Any,
+    result_queue: Any,
+) -> bool:
+    """
+    Process pool entry point. Streams the ordinals of found models to
+    result_queue, followed by None. Returns False if cancelled.
+    """
+    channel = _WorkerChannel(cancel_event, result_queue)
+    builder = ModelBuilder(
+        equations,
+        input_vars,
+        output_vars,
+        method=method,
+        cancel_token=channel,
+        on_model=channel.put,
+    )
+    try:
+        return not builder.build_models().incomplete
+    finally:
+        channel.flush()
+        result_queue.put(None)
+
+
+@dataclass
+class _Job:
+    future: "Future[bool]"
+    cancel_event: Any
+    result_queue: Any
+    condition: asyncio.Condition = field(default_factory=asyncio.Condition)
+    results: List[Ordinals] = field(default_factory=list)
+    subscribers: int = 0
+    done: bool = False
+    error: Optional[BaseException] = None
+    reader: Optional["asyncio.Task[None]"] = None
+
+
+def _get_batch(result_queue: Any) -> Optional[List[Ordinals]]:
+    try:
+        batch: Optional[List[Ordinals]] = result_queue.get(timeout=0.1)
+        return batch
+    except queue.Empty:
+        return []
+
+
+class ModelBuildingService:
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        mp_context: Optional[BaseContext] = None,
+    ) -> None:
+        self.max_workers: Optional[int] = max_workers
+        self.mp_context: BaseContext = (
+            mp_context or multiprocessing.get_context("spawn")
+        )
+        self.stats: Dict[str, int] = {"submitted": 0, "coalesced": 0}
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._manager: Optional[SyncManager] = None
+        self._jobs: Dict[RequestKey, _Job] = {}
+        self._fingerprints: "WeakKeyDictionary[EquationLibrary, str]" = (
+            WeakKeyDictionary()
+        )
+
+    async def __aenter__(self) -> "ModelBuildingService":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        for job in list(self._jobs.values()):
+            job.cancel_event.set()
+        readers = [job.reader for job in self._jobs.values() if job.reader]
+        await asyncio.gather(*readers, return_exceptions=True)
+        self._jobs.clear()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+        if self._manager is not None:
+            self._manager.shutdown()
+            self._manager = None
+
+    async def build_models(
+        self,
+        equations: Union[List[Equation], EquationLibrary],
+        input_vars: List[str],
+        output_vars: List[str],
+        method: str = "exhaustive",
+    ) -> List[EquationGroup]:
+        return [
+            model
+            async for model in self.stream_models(
+                equations, input_vars, output_vars, method
+            )
+        ]
+
+    async def stream_models(
+        self,
+        equations: Union[List[Equation], EquationLibrary],
+        input_vars: List[str],
+        output_vars: List[str],
+        method: str = "exhaustive",
+    ) -> AsyncGenerator[EquationGroup, None]:
+        """
+        Yield models as the shared search finds them. Leaving the loop
+        early or cancelling the consuming task stops the search once no
+        other request is waiting on it. With an EquationLibrary, the
+        worker builds from the library and input and output variable
+        names are normalized like the library's.
+        """
+        source: Union[List[Equation], EquationLibrary]
+        if isinstance(equations, EquationLibrary):
+            source = equations
+            numbered = equations.equations
+            fingerprint = self._fingerprints.get(equations)
+            if fingerprint is None:
+                fingerprint = library_fingerprint(numbered)
+                self._fingerprints[equations] = fingerprint
+            inputs = {equations.normalize(var) for var in input_vars}
+            outputs = {equations.normalize(var) for var in output_vars}
+        else:
+            numbered = [eq.with_ordinal(i) for i, eq in enumerate(equations)]
+            source = numbered
+            fingerprint = library_fingerprint(numbered)
+            inputs, outputs = set(input_vars), set(output_vars)
+        key: RequestKey = (
+            fingerprint,
+            tuple(sorted(inputs)),
+            tuple(sorted(outputs)),
+            method,
+        )
+        job = self._subscribe(key, source, input_vars, output_vars, method)
+        try:
+            index = 0
+            while True:
+                async with job.condition:
+                    await job.condition.wait_for(
+                        lambda: index < len(job.results) or job.done
+                    )
+                while index < len(job.results):
+                    ordinals = job.results[index]
+                    index += 1
+                    yield EquationGroup([numbered[i] for i in ordinals])
+                if job.done and index == len(job.results):
+                    break
+            if job.error is not None:
+                raise job.error
+        finally:
+            self._unsubscribe(key, job)
+
+    def _subscribe(
+        self,
+        key: RequestKey,
+        equations: Union[List[Equation], EquationLibrary],
+        input_vars: List[str],
+        output_vars: List[str],
+        method: str,
+    ) -> _Job:
+        job = self._jobs.get(key)
+        if job is not None:
+            self.stats["coalesced"] += 1
+        else:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    self.max_workers, mp_context=self.mp_context
+                )
+            if self._manager is None:
+                self._manager = self.mp_context.Manager()  # type: ignore
+            cancel_event = self._manager.Event()
+            result_queue = self._manager.Queue()
+            future = self._executor.submit(
+                _run_build,
+                equations,
+                list(input_vars),
+                list(output_vars),
+                method,
+                cancel_event,
+                result_queue,
+            )
+            job = _Job(future, cancel_event, result_queue)
+            job.reader = asyncio.create_task(self._read(job))
+            self._jobs[key] = job
+            self.stats["submitted"] += 1
+        job.subscribers += 1
+        return job
+
+    def _unsubscribe(self, key: RequestKey, job: _Job) -> None:
+        job.subscribers -= 1
+        if job.subscribers > 0:
+            return
+        if not job.done:
+            job.cancel_event.set()
+        if self._jobs.get(key) is job:
+            del self._jobs[key]
+
+    async def _read(self, job: _Job) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await loop.run_in_executor(
+                None, _get_batch, job.result_queue
+            )
+            if batch is None or (not batch and job.future.done()):
+                break
+            if batch:
+                async with job.condition:
+                    job.results.extend(batch)
+                    job.condition.notify_all()
+        try:
+            if not await asyncio.wrap_future(job.future):
+                job.error = BuildCancelled()
+        except BaseException as error:
+            job.error = error
+        async with job.condition:
+            job.done = True
+            job.condition.notify_all()
+
+
+_default_service: Optional[ModelBuildingService] = None
+
+
+def get_default_service() -> ModelBuildingService:
+    global _default_service
+    if _default_service is None:
+        _default_service = ModelBuildingService()
+    return _default_service
+
+
+async def build_models_async(
+    equations: Union[List[Equation], EquationLibrary],
+    input_vars: List[str],
+    output_vars: List[str],
+    method: str = "exhaustive",
+) -> List[EquationGroup]:
+    """
+    Build models in the process pool of the default service.
+    """
+    return await get_default_service().build_models(
+        equations, input_vars, output_vars, method
+    )
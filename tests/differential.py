@@ -0,0 +1,283 @@
+"""
+Randomized differential harness for the model building methods.
+
+Seeded libraries with controllable structure are built with every method
+and compared against build_models_exhaustive. Complete methods must find
+exactly the exhaustive model set; heuristic methods must only return
+valid models, and their missing models are counted. Failing cases are
+shrunk to a minimal library, and the time spent in each method is
+recorded.
+
+Run at scale with e.g.
+    python -m tests.differential --cases 500 --equations 14 --seed 1
+"""
+
+import argparse
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence
+
+from preq_pmob.equation import Equation
+from preq_pmob.model_builder import ModelBuilder
+
+METHODS = [
+    "exhaustive",
+    "gradual",
+    "refined_gradual",
+    "two_step_combination",
+    "product_recursive_combination",
+    "sat",
+]
+# Methods that must find every model found by build_models_exhaustive
+COMPLETE_METHODS = {"exhaustive", "sat"}
+
+
+@dataclass
+class Case:
+    equations: List[Equation]
+    input_vars: List[str]
+    output_vars: List[str]
+
+    def __str__(self) -> str:
+        eqs = "\n".join(
+            f"    {eq.equation_str}: {sorted(eq.variables)}"
+            for eq in self.equations
+        )
+        return (
+            f"  input_vars: {self.input_vars}\n"
+            f"  output_vars: {self.output_vars}\n"
+            f"  equations:\n{eqs}"
+        )
+
+
+@dataclass
+class Failure:
+    method: str
+    message: str
+    case: Case
+
+
+@dataclass
+class Report:
+    n_cases: int = 0
+    timings: Dict[str, float] = field(default_factory=dict)
+    missing_models: Dict[str, int] = field(default_factory=dict)
+    n_models: int = 0
+    failures: List[Failure] = field(default_factory=list)
+
+    def summary(self) -> str:
+        lines = [f"{self.n_cases} cases, {self.n_models} models"]
+        for method, seconds in self.timings.items():
+            lines.append(
+                f"  {method:<30} {seconds:9.3f} s"
+                f"  missing {self.missing_models.get(method, 0)}"
+            )
+        for failure in self.failures:
+            lines.append(f"FAIL {failure.message}")
+            lines.append(str(failure.case))
+        return "\n".join(lines)
+
+
+def generate_case(
+    rng: random.Random,
+    n_equations: int = 8,
+    n_variables: int = 6,
+    max_arity: int = 3,
+    constant_ratio: float = 0.2,
+    duplicate_ratio: float = 0.1,
+    n_components: int = 1,
+    n_inputs: int = 1,
+    n_outputs: int = 1,
+) -> Case:
+    """
+    Generate a random library. Variables are split into n_components
+    groups and each equation draws its variables from one group.
+    Constant equations have a single variable, and duplicates repeat the
+    variables of an earlier equation. Required variables are sampled
+    among all variables, so some may appear in no equation.
+    """
+    variables = [f"v{i}" for i in range(n_variables)]
+    groups = [variables[i::n_components] for i in range(n_components)]
+    equations: List[Equation] = []
+    for i in range(n_equations):
+        if equations and rng.random() < duplicate_ratio:
+            eq_vars = list(rng.choice(equations).variables)
+        else:
+            group = rng.choice(groups)
+            arity = (
+                1
+                if rng.random() < constant_ratio
+                else rng.randint(2, max(2, min(max_arity, len(group))))
+            )
+            eq_vars = rng.sample(group, min(arity, len(group)))
+        equations.append(Equation(f"e{i}", eq_vars))
+
+    required = rng.sample(variables, min(n_inputs + n_outputs, len(variables)))
+    return Case(equations, required[:n_inputs], required[n_inputs:])
+
+
+def check_case(
+    case: Case,
+    methods: Sequence[str] = METHODS,
+    report: Optional[Report] = None,
+) -> List[str]:
+    """
+    Return a message for each property violated by the methods on case,
+    adding timings and missing model counts to report if given.
+    """
+    messages: List[str] = []
+    builder = ModelBuilder(case.equations, case.input_vars, case.output_vars)
+    expected = set(builder.build_models_exhaustive())
+    if report is not None:
+        report.n_models += len(expected)
+    if builder.count_models() != len(expected):
+        messages.append(
+            f"count: count_models() = {builder.count_models()}, "
+            f"expected {len(expected)}"
+        )
+
+    for method in methods:
+        builder = ModelBuilder(
+            case.equations, case.input_vars, case.output_vars
+        )
+        start = time.perf_counter()
+        try:
+            models = getattr(builder, f"build_models_{method}")()
+        except Exception as e:
+            messages.append(f"{method}: raised {type(e).__name__}: {e}")
+            continue
+        elapsed = time.perf_counter() - start
+
+        found = set(models)
+        missing = len(expected - found)
+        if report is not None:
+            report.timings[method] = report.timings.get(method, 0.0) + elapsed
+            report.missing_models[method] = (
+                report.missing_models.get(method, 0) + missing
+            )
+        if len(found) != len(models):
+            messages.append(f"{method}: returned duplicate models")
+        if found - expected:
+            messages.append(
+                f"{method}: invalid models {sorted(found - expected)}"
+            )
+        if method in COMPLETE_METHODS and missing:
+            messages.append(
+                f"{method}: missing models {sorted(expected - found)}"
+            )
+    return messages
+
+
+def shrink(case: Case, fails: Callable[[Case], bool]) -> Case:
+    """
+    Greedily remove equations, equation variables and required variables
+    while fails(case) stays true.
+    """
+    changed = True
+    while changed:
+        changed = False
+        candidates: List[Case] = []
+        for i in range(len(case.equations)):
+            candidates.append(
+                Case(
+                    case.equations[:i] + case.equations[i + 1 :],
+                    case.input_vars,
+                    case.output_vars,
+                )
+            )
+        for i, eq in enumerate(case.equations):
+            for var in sorted(eq.variables) if len(eq.variables) > 1 else []:
+                smaller = Equation(eq.equation_str, eq.variables - {var})
+                candidates.append(
+                    Case(
+                        case.equations[:i]
+                        + [smaller]
+                        + case.equations[i + 1 :],
+                        case.input_vars,
+                        case.output_vars,
+                    )
+                )
+        for var in case.input_vars:
+            candidates.append(
+                Case(
+                    case.equations,
+                    [v for v in case.input_vars if v != var],
+                    case.output_vars,
+                )
+            )
+        for var in case.output_vars:
+            candidates.append(
+                Case(
+                    case.equations,
+                    case.input_vars,
+                    [v for v in case.output_vars if v != var],
+                )
+            )
+        for candidate in candidates:
+            if candidate.equations and fails(candidate):
+                case = candidate
+                changed = True
+                break
+    return case
+
+
+def _failure_kind(message: str) -> str:
+    # e.g. "gradual: raised KeyError:" or "sat: missing models"
+    return " ".join(message.split()[:3])
+
+
+def run_harness(
+    seed: int = 0,
+    n_cases: int = 100,
+    methods: Sequence[str] = METHODS,
+    **generator_options: int,
+) -> Report:
+    """
+    Check n_cases generated libraries. Sizes not fixed by
+    generator_options are drawn per case around their defaults.
+    """
+    rng = random.Random(seed)
+    report = Report()
+    for _ in range(n_cases):
+        options = {
+            "n_equations": rng.randint(3, 10),
+            "n_variables": rng.randint(3, 8),
+            "n_components": rng.choice([1, 1, 2]),
+            "n_inputs": rng.randint(0, 2),
+            "n_outputs": rng.randint(0, 2),
+            **generator_options,
+        }
+        case = generate_case(rng, **options)
+        report.n_cases += 1
+        for message in check_case(case, methods, report):
+            method = message.split(":", 1)[0]
+            method_list = [method] if method in methods else []
+            shrunk = shrink(
+                case,
+                lambda c: any(
+                    _failure_kind(m) == _failure_kind(message)
+                    for m in check_case(c, method_list)
+                ),
+            )
+            report.failures.append(Failure(method, message, shrunk))
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--cases", type=int, default=100)
+    parser.add_argument("--equations", type=int)
+    parser.add_argument("--variables", type=int)
+    parser.add_argument("--methods", nargs="+", default=METHODS)
+    args = parser.parse_args()
+
+    options: Dict[str, int] = {}
+    if args.equations is not None:
+        options["n_equations"] = args.equations
+    if args.variables is not None:
+        options["n_variables"] = args.variables
+    report = run_harness(args.seed, args.cases, args.methods, **options)
+    print(report.summary())
+    raise SystemExit(1 if report.failures else 0)
@@ -0,0 +1,117 @@
+import io
+import json
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from typing import Any, Dict
+from unittest import mock
+
+from preq_pmob.cli import IMPORT_TIME_BUDGET, main
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+class TestCli(unittest.TestCase):
+    def setUp(self) -> None:
+        self.case: Dict[str, Any] = {
+            "name": "toy",
+            "variables": {
+                "input_variables": ["x1", "x2"],
+                "output_variables": ["y"],
+            },
+            "equations": [
+                {"equation": "y = x1 + x2", "variables": ["y", "x1", "x2"]},
+                {"equation": "y = x2 ** 2", "variables": ["y", "x2"]},
+                {"equation": "x2 = 1", "variables": ["x2"]},
+                {"equation": "x1 = 2 * x2", "variables": ["x1", "x2"]},
+                {"equation": "z = x1 + y", "variables": ["z", "x1", "y"]},
+            ],
+        }
+
+    def run_main(self, *argv: str, status: int = 0) -> Dict[str, Any]:
+        stdin = io.StringIO(json.dumps(self.case))
+        stdout = io.StringIO()
+        with mock.patch.object(sys, "stdin", stdin), mock.patch.object(
+            sys, "stdout", stdout
+        ):
+            self.assertEqual(main(list(argv)), status)
+        result: Dict[str, Any] = json.loads(stdout.getvalue())
+        return result
+
+    def test_build_models(self) -> None:
+        result = self.run_main("-m", "exhaustive")
+        self.assertEqual(result["name"], "toy")
+        self.assertFalse(result["incomplete"])
+        self.assertEqual(result["n_models"], len(result["built_models"]))
+        self.assertIn(["y = x1 + x2"], result["built_models"])
+
+    def test_count_and_top_k(self) -> None:
+        n_models = self.run_main("-m", "exhaustive")["n_models"]
+        self.assertEqual(self.run_main("--count")["n_models"], n_models)
+        self.assertEqual(self.run_main("--count")["method"], "count")
+        top = self.run_main("--top-k", "1")
+        self.assertEqual(top["built_models"], [["y = x1 + x2"]])
+        self.assertEqual(top["method"], "top_k")
+
+    def test_timeout(self) -> None:
+        for options in [[], ["--count"], ["--top-k", "2"]]:
+            result = self.run_main(*options, "--timeout", "-1", status=1)
+            self.assertTrue(result["incomplete"], options)
+            self.assertIn("n_models", result, options)
+        self.assertIsNone(
+            self.run_main("--count", "--timeout", "-1", status=1)["n_models"]
+        )
+
+    def test_case_and_output_files(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            case_file = Path(tmp) / "case.json"
+            output_file = Path(tmp) / "models.json"
+            case_file.write_text(json.dumps(self.case))
+            self.assertEqual(main([str(case_file), "-o", str(output_file)]), 0)
+            result = json.loads(output_file.read_text())
+        self.assertEqual(result["method"], "sat")
+        self.assertTrue(result["n_models"] > 0)
+
+    def test_module_entry_point(self) -> None:
+        process = subprocess.run(
+            [sys.executable, "-m", "preq_pmob", "--count"],
+            input=json.dumps(self.case),
+            capture_output=True,
+            text=True,
+            cwd=ROOT,
+            check=True,
+        )
+        self.assertEqual(json.loads(process.stdout)["name"], "toy")
+
+    def test_startup_defers_heavy_imports(self) -> None:
+        code = (
+            "import sys\n"
+            "import preq_pmob.cli\n"
+            "heavy = ['numpy', 'psutil', 'tap', 'asyncio', "
+            "'multiprocessing']\n"
+            "print(','.join(m for m in heavy if m in sys.modules))\n"
+        )
+        import_times = []
+        for _ in range(3):
+            process = subprocess.run(
+                [sys.executable, "-X", "importtime", "-c", code],
+                capture_output=True,
+                text=True,
+                cwd=ROOT,
+                check=True,
+            )
+            self.assertEqual(process.stdout.strip(), "")
+            # "import time: self [us] | cumulative [us] | module"
+            for line in process.stderr.splitlines():
+                fields = line.split("|")
+                if len(fields) == 3 and fields[2].strip() == "preq_pmob.cli":
+                    import_times.append(int(fields[1]) / 1e6)
+        self.assertEqual(len(import_times), 3)
+        # The fastest run is the least disturbed by machine load
+        self.assertLess(min(import_times), IMPORT_TIME_BUDGET)
+
+
+if __name__ == "__main__":
+    unittest.main()
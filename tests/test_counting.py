@@ -0,0 +1,55 @@
+import random
+import unittest
+from typing import List
+
+from preq_pmob.counting import count_models
+from preq_pmob.equation import Equation
+from preq_pmob.model_builder import ModelBuilder
+from tests.differential import generate_case
+
+
+class TestCountModels(unittest.TestCase):
+    def test_matches_exhaustive_on_random_libraries(self) -> None:
+        rng = random.Random(2)
+        for _ in range(60):
+            # Duplicates are interchangeable with an earlier equation
+            case = generate_case(
+                rng,
+                n_equations=rng.randint(3, 11),
+                n_variables=rng.randint(3, 8),
+                duplicate_ratio=0.2,
+                n_inputs=rng.randint(0, 2),
+                n_outputs=rng.randint(0, 2),
+            )
+            builder: ModelBuilder = ModelBuilder(
+                case.equations, case.input_vars, case.output_vars
+            )
+            self.assertEqual(
+                builder.count_models(), len(builder.build_models())
+            )
+
+    def test_required_variable_without_equation(self) -> None:
+        equations: List[Equation] = [Equation("x = 1", ["x"])]
+        self.assertEqual(count_models(equations, {"x"}, {"x", "y"}), 0)
+
+    def test_independent_interchangeable_blocks(self) -> None:
+        # 2 ** 10 ways to pick one of two equivalent equations per block
+        equations: List[Equation] = []
+        for block in range(10):
+            for copy in range(2):
+                equations.append(
+                    Equation(
+                        f"y{block} = f{copy}(x{block})",
+                        [f"x{block}", f"y{block}"],
+                    )
+                )
+        input_vars = {f"x{block}" for block in range(10)}
+        output_vars = {f"y{block}" for block in range(10)}
+        self.assertEqual(
+            count_models(equations, input_vars, input_vars | output_vars),
+            1024,
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
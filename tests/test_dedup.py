@@ -0,0 +1,88 @@
+import random
+import unittest
+from typing import List, Set
+
+from preq_pmob.dedup import FAN_IN, KeyStore
+from preq_pmob.equation_group import EquationGroup
+from preq_pmob.model_builder import ModelBuilder
+from tests.differential import Case, generate_case
+
+
+class TestKeyStore(unittest.TestCase):
+    def test_in_memory(self) -> None:
+        store: KeyStore = KeyStore(2)
+        for key in [5, 3, 5, 0, 3]:
+            store.add(key)
+        self.assertEqual(list(store), [0, 3, 5])
+        self.assertEqual(store.n_runs, 0)
+
+    def test_spilled_runs_are_merged(self) -> None:
+        rng = random.Random(0)
+        keys: List[int] = [rng.randrange(1 << 70) for _ in range(3000)]
+        keys += keys[:1000]
+        rng.shuffle(keys)
+        n_spilled: List[int] = []
+        store: KeyStore = KeyStore(
+            9, memory_limit=4096, on_spill=lambda: n_spilled.append(1)
+        )
+        for key in keys:
+            store.add(key)
+        self.assertGreater(store.n_runs, 1)
+        self.assertEqual(len(n_spilled), store.n_runs)
+        self.assertEqual(list(store), sorted(set(keys)))
+        store.close()
+        self.assertEqual(list(store), [])
+
+    def test_runs_are_merged_by_level(self) -> None:
+        # Each key is spilled as its own run
+        store: KeyStore = KeyStore(2, memory_limit=1)
+        n_keys = 2 * FAN_IN**2 + 3 * FAN_IN + 1
+        for key in range(n_keys):
+            store.add(key)
+        self.assertEqual(store.n_runs, n_keys)
+        # The open runs follow the base FAN_IN digits of n_keys
+        self.assertEqual(store._levels, [2, 2, 1, 1, 1, 0])
+        self.assertEqual(list(store), list(range(n_keys)))
+        store.close()
+
+
+class TestMemoryBoundedBuild(unittest.TestCase):
+    def assert_spilling_keeps_models(self, case: Case, method: str) -> None:
+        expected: Set[EquationGroup] = set(
+            ModelBuilder(
+                case.equations,
+                case.input_vars,
+                case.output_vars,
+                method=method,
+            ).build_models()
+        )
+        builder: ModelBuilder = ModelBuilder(
+            case.equations,
+            case.input_vars,
+            case.output_vars,
+            method=method,
+            memory_limit=128,
+        )
+        models: List[EquationGroup] = builder.build_models()
+        self.assertEqual(set(models), expected, method)
+        self.assertEqual(len(models), len(expected), method)
+        self.assertGreater(builder.stats["spilled_runs"], 0, method)
+
+    def test_spilling_keeps_models(self) -> None:
+        case = generate_case(random.Random(0), n_equations=14, n_variables=8)
+        for method in [
+            "gradual",
+            "refined_gradual",
+            "two_step_combination",
+        ]:
+            self.assert_spilling_keeps_models(case, method)
+
+    def test_spilling_keeps_recursive_models(self) -> None:
+        case = generate_case(random.Random(1), n_equations=10, n_variables=6)
+        self.assert_spilling_keeps_models(
+            case, "product_recursive_combination"
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
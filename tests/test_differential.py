@@ -0,0 +1,53 @@
+import random
+import unittest
+
+from preq_pmob.equation import Equation
+from tests.differential import (
+    Case,
+    check_case,
+    generate_case,
+    run_harness,
+    shrink,
+)
+
+
+class TestDifferentialHarness(unittest.TestCase):
+    def test_methods_agree_with_exhaustive(self) -> None:
+        report = run_harness(seed=0, n_cases=60)
+        self.assertEqual(report.failures, [], report.summary())
+        self.assertEqual(report.n_cases, 60)
+        self.assertGreater(report.n_models, 0)
+        self.assertEqual(report.missing_models["sat"], 0)
+
+    def test_generate_case_is_seeded(self) -> None:
+        first = generate_case(random.Random(4), n_equations=12)
+        second = generate_case(random.Random(4), n_equations=12)
+        self.assertEqual(str(first), str(second))
+        self.assertEqual(len(first.equations), 12)
+
+    def test_shrink(self) -> None:
+        case = generate_case(
+            random.Random(5), n_equations=10, constant_ratio=0.0
+        )
+        equation = case.equations[3]
+
+        def fails(c: Case) -> bool:
+            # Fails while an equation has the variables of equation 3
+            return any(
+                eq.variables >= equation.variables for eq in c.equations
+            )
+
+        shrunk = shrink(case, fails)
+        self.assertEqual(len(shrunk.equations), 1)
+        self.assertEqual(shrunk.equations[0].variables, equation.variables)
+        self.assertEqual(shrunk.input_vars + shrunk.output_vars, [])
+
+    def test_check_case_on_trivial_libraries(self) -> None:
+        case = Case([Equation("x = 1", ["x"])], [], ["x"])
+        self.assertEqual(check_case(case), [])
+        case = Case([Equation("x = 1", ["x"])], ["x"], ["y"])
+        self.assertEqual(check_case(case), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,7 +1,9 @@
+import pickle
+import sys
 import unittest
 from typing import List, Set
 
-from preq_pmob.equation import Equation
+from preq_pmob.equation import Equation, number_variables
 
 
 class TestEquation(unittest.TestCase):
@@ -21,6 +23,58 @@ class TestEquation(unittest.TestCase):
         expected_vars: Set[str] = {"x2"}
         self.assertEqual(eq.variables, expected_vars)
 
+    def test_equation_is_immutable(self) -> None:
+        eq: Equation = Equation("y = x1 + x2", ["y", "x1", "x2"])
+        self.assertFalse(hasattr(eq, "__dict__"))
+        with self.assertRaises(AttributeError):
+            eq.equation_str = "y = x1"  # type: ignore[misc]
+        with self.assertRaises(AttributeError):
+            eq.ordinal = 3  # type: ignore[misc]
+
+    def test_variables_are_interned(self) -> None:
+        eq: Equation = Equation("y = x1 + x2", ["y", "x1", "x2"])
+        self.assertIsInstance(eq.variables, frozenset)
+        for var in eq.variables:
+            self.assertIs(var, sys.intern(var))
+
+    def test_with_ordinal(self) -> None:
+        eq: Equation = Equation("y = x1 + x2", ["y", "x1", "x2"])
+        numbered: Equation = eq.with_ordinal(4)
+        self.assertEqual(eq.ordinal, -1)
+        self.assertEqual(numbered.ordinal, 4)
+        self.assertEqual(numbered.variables, eq.variables)
+        self.assertIs(numbered.with_ordinal(4), numbered)
+        # Equality and hashing ignore the ordinal
+        self.assertEqual(eq, numbered)
+        self.assertEqual(hash(eq), hash(numbered))
+        same: Equation = Equation("y = x1 + x2", ["x2", "x1", "y"], 4)
+        self.assertEqual(numbered, same)
+        self.assertEqual(hash(numbered), hash(same))
+        self.assertNotEqual(eq, Equation("y = x1 + x2", ["y", "x1"]))
+        self.assertNotEqual(eq, Equation("y = x2 + x1", ["y", "x1", "x2"]))
+
+    def test_variable_mask(self) -> None:
+        equations: List[Equation] = [
+            Equation("y = x1 + x2", ["y", "x1", "x2"]),
+            Equation("z = y", ["z", "y"]),
+        ]
+        variable_bits = number_variables(equations)
+        self.assertEqual(variable_bits, {"x1": 0, "x2": 1, "y": 2, "z": 3})
+        self.assertEqual(equations[0].mask, 0)
+        numbered: Equation = equations[1].with_ordinal(1, variable_bits)
+        self.assertEqual(numbered.mask, 0b1100)
+        self.assertIs(numbered.with_ordinal(1, variable_bits), numbered)
+        # Without a numbering, the mask is kept
+        self.assertEqual(numbered.with_ordinal(5).mask, 0b1100)
+
+    def test_pickle(self) -> None:
+        eq: Equation = Equation("y = x1 + x2", ["y", "x1", "x2"], 2, 0b111)
+        loaded: Equation = pickle.loads(pickle.dumps(eq))
+        self.assertEqual(loaded, eq)
+        self.assertEqual(loaded.ordinal, eq.ordinal)
+        self.assertEqual(loaded.mask, eq.mask)
+        self.assertEqual(hash(loaded), hash(eq))
+
 
 if __name__ == "__main__":
     unittest.main()
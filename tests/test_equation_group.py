@@ -44,6 +44,49 @@ class TestEquationGroup(unittest.TestCase):
         group_full: EquationGroup = EquationGroup([eq1, eq2, eq3])
         self.assertFalse(group_full.has_correct_dof(input_vars))
 
+    def test_canonical_key(self) -> None:
+        eq1: Equation = Equation("y = x1 + x2", ["y", "x1", "x2"], 0)
+        eq2: Equation = Equation("x2 = 1", ["x2"], 2)
+        group: EquationGroup = EquationGroup([eq2, eq1])
+        self.assertEqual(group.key, 0b101)
+        self.assertEqual(group.ordinals, (0, 2))
+        self.assertEqual(group, EquationGroup([eq1, eq2]))
+        self.assertEqual(hash(group), hash(EquationGroup([eq1, eq2])))
+        self.assertLess(EquationGroup([eq1]), group)
+
+        # Equations without ordinals are keyed by their strings
+        eq3: Equation = Equation("x2 = 1", ["x2"])
+        self.assertEqual(EquationGroup([eq3]).key, ("x2 = 1",))
+
+    def test_equality_with_unnumbered_group(self) -> None:
+        eq1: Equation = Equation("y = x1 + x2", ["y", "x1", "x2"])
+        eq2: Equation = Equation("x2 = 1", ["x2"])
+        numbered: EquationGroup = EquationGroup(
+            [eq1.with_ordinal(0), eq2.with_ordinal(2)]
+        )
+        group: EquationGroup = EquationGroup([eq2, eq1])
+        # Groups are compared by their equations, whatever the numbering
+        self.assertEqual(group, numbered)
+        self.assertEqual(hash(group), hash(numbered))
+        self.assertIn(group, {numbered})
+        self.assertNotEqual(EquationGroup([eq1]), numbered)
+        renumbered: EquationGroup = EquationGroup(
+            [eq1.with_ordinal(1), eq2.with_ordinal(0)]
+        )
+        self.assertEqual(renumbered, numbered)
+        self.assertEqual(hash(renumbered), hash(numbered))
+
+    def test_equal_ordinals_of_different_equations(self) -> None:
+        group1: EquationGroup = EquationGroup(
+            [Equation("x = 1", ["x"]).with_ordinal(0)]
+        )
+        group2: EquationGroup = EquationGroup(
+            [Equation("y = 2", ["y"]).with_ordinal(0)]
+        )
+        self.assertEqual(group1.key, group2.key)
+        self.assertNotEqual(group1, group2)
+        self.assertEqual(len({group1, group2}), 2)
+
 
 if __name__ == "__main__":
     unittest.main()
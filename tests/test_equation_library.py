@@ -0,0 +1,65 @@
+import unittest
+from typing import List
+
+from preq_pmob.equation import Equation
+from preq_pmob.equation_group import EquationGroup
+from preq_pmob.equation_library import EquationLibrary, normalize_variable
+from preq_pmob.model_builder import ModelBuilder
+
+
+class TestEquationLibrary(unittest.TestCase):
+    def setUp(self) -> None:
+        self.library: EquationLibrary = EquationLibrary(
+            [
+                Equation("y = x1 + x2", ["y", "x_1", "x2"]),
+                Equation("y = x2 ** 2", ["y", "x_{2}"]),
+                Equation("x2 = 1", ["x2"]),
+                Equation("x1 = 2 * x2", ["x1", "x_2"]),
+                Equation("z = x1 + y", ["z", "x_{1}", "y"]),
+            ]
+        )
+
+    def test_normalize_variable(self) -> None:
+        for var in ["x_1", "x1", "x_{1}", " x_1 "]:
+            self.assertEqual(normalize_variable(var), "x1")
+
+    def test_variables_are_merged(self) -> None:
+        self.assertEqual(self.library.variables, {"x1", "x2", "y", "z"})
+        self.assertEqual(list(self.library.index["x1"]), [0, 3, 4])
+
+    def test_equations_touching(self) -> None:
+        touching: List[Equation] = self.library.equations_touching(
+            ["z", "x_{2}"]
+        )
+        self.assertEqual([eq.ordinal for eq in touching], [0, 1, 2, 3, 4])
+        self.assertEqual(
+            [eq.equation_str for eq in self.library.equations_with("z")],
+            ["z = x1 + y"],
+        )
+        self.assertEqual(self.library.equations_touching(["w"]), [])
+
+    def test_builders_share_the_index(self) -> None:
+        first: ModelBuilder = ModelBuilder(self.library, ["x_1", "x2"], ["y"])
+        second: ModelBuilder = ModelBuilder(
+            self.library, ["x1", "x_{2}"], ["y"], method="refined_gradual"
+        )
+        self.assertIs(first.var_to_eq_map, second.var_to_eq_map)
+        self.assertEqual(first.input_vars, {"x1", "x2"})
+
+        models: List[EquationGroup] = first.build_models()
+        self.assertTrue(len(models) > 0)
+        self.assertEqual(set(models), set(second.build_models()))
+
+    def test_variable_masks(self) -> None:
+        bits = self.library.variable_bits
+        self.assertEqual(set(bits), self.library.variables)
+        for eq in self.library:
+            self.assertEqual(eq.mask, sum(1 << bits[v] for v in eq.variables))
+        builder: ModelBuilder = ModelBuilder(self.library, ["x1"], ["y"])
+        self.assertIs(builder.variable_bits, bits)
+        self.assertEqual(builder.equations, self.library.equations)
+        self.assertIs(builder.equations[0], self.library.equations[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+import random
+import unittest
+from itertools import combinations
+from typing import List
+from unittest import mock
+
+from preq_pmob import kernel, model_builder
+from preq_pmob.equation_group import EquationGroup
+from preq_pmob.kernel import ACCELERATED, SubsetChecker, combination_masks
+from preq_pmob.model_builder import ModelBuilder
+from tests.differential import Case, generate_case
+
+
+def checker_for(case: Case) -> SubsetChecker:
+    return SubsetChecker(
+        case.equations,
+        set(case.input_vars),
+        set(case.input_vars + case.output_vars),
+    )
+
+
+class TestSubsetChecker(unittest.TestCase):
+    def assert_matches_equation_group(self, checker: SubsetChecker) -> None:
+        masks: List[int] = list(range(1 << len(checker.equations)))
+        expected: List[int] = [
+            mask
+            for mask in masks
+            if mask
+            and EquationGroup(
+                [eq for i, eq in enumerate(checker.equations) if mask >> i & 1]
+            ).check_desirability_at_once(
+                checker.input_vars, checker.required_vars
+            )
+        ]
+        self.assertEqual(checker.check_masks(masks), expected)
+
+    @unittest.skipUnless(ACCELERATED, "NumPy is not installed")
+    def test_check_masks(self) -> None:
+        rng = random.Random(0)
+        for _ in range(20):
+            case = generate_case(rng, n_equations=9, n_variables=8)
+            self.assert_matches_equation_group(checker_for(case))
+
+    def test_check_masks_without_numpy(self) -> None:
+        rng = random.Random(1)
+        with mock.patch.object(kernel, "ACCELERATED", False):
+            case = generate_case(rng, n_equations=7, n_inputs=0)
+            self.assert_matches_equation_group(checker_for(case))
+
+    @unittest.skipUnless(ACCELERATED, "NumPy is not installed")
+    def test_check_masks_beyond_64_equations(self) -> None:
+        rng = random.Random(2)
+        checker = checker_for(
+            generate_case(rng, n_equations=70, n_variables=8)
+        )
+        masks: List[int] = [
+            sum(1 << i for i in rng.sample(range(70), rng.randint(1, 6)))
+            for _ in range(500)
+        ]
+        with mock.patch.object(kernel, "ACCELERATED", False):
+            expected = checker.check_masks(masks)
+        self.assertEqual(checker.check_masks(masks), expected)
+
+    @unittest.skipUnless(ACCELERATED, "NumPy is not installed")
+    def test_combination_masks(self) -> None:
+        for n_items, size in [(0, 0), (5, 0), (6, 3), (12, 5), (12, 12)]:
+            for batch_size in [1, 7, 1000]:
+                masks = [
+                    int(mask)
+                    for batch in combination_masks(n_items, size, batch_size)
+                    for mask in batch
+                ]
+                expected = [
+                    sum(1 << i for i in c)
+                    for c in combinations(range(n_items), size)
+                ]
+                self.assertEqual(masks, expected)
+
+    @unittest.skipUnless(ACCELERATED, "NumPy is not installed")
+    def test_exhaustive_matches_python_path(self) -> None:
+        rng = random.Random(3)
+        case = generate_case(rng, n_equations=15, n_variables=8)
+        with mock.patch.object(model_builder, "ACCELERATED", False):
+            expected = ModelBuilder(
+                case.equations, case.input_vars, case.output_vars
+            ).build_models()
+        models = ModelBuilder(
+            case.equations, case.input_vars, case.output_vars
+        ).build_models()
+        self.assertEqual(list(models), list(expected))
+
+
+if __name__ == "__main__":
+    unittest.main()
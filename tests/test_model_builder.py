@@ -1,9 +1,15 @@
+import time
 import unittest
-from typing import List, Set
+from itertools import combinations
+from typing import List, Set, Tuple
 
 from preq_pmob.equation import Equation
 from preq_pmob.equation_group import EquationGroup
-from preq_pmob.model_builder import ModelBuilder
+from preq_pmob.model_builder import (
+    BuildResult,
+    CancelToken,
+    ModelBuilder,
+)
 
 
 class TestModelBuilder(unittest.TestCase):
@@ -60,6 +66,194 @@ class TestModelBuilder(unittest.TestCase):
             self.assertTrue(model.has_required_variables(required_vars))
             self.assertEqual(model.degrees_of_freedom(), len(self.input_vars))
 
+    def test_build_models_combination_methods(self) -> None:
+        exhaustive: List[EquationGroup] = ModelBuilder(
+            self.equations, list(self.input_vars), list(self.output_vars)
+        ).build_models()
+        for method in [
+            "two_step_combination",
+            "product_recursive_combination",
+        ]:
+            builder: ModelBuilder = ModelBuilder(
+                self.equations,
+                list(self.input_vars),
+                list(self.output_vars),
+                method=method,
+            )
+            models: List[EquationGroup] = builder.build_models()
+            self.assertTrue(len(models) > 0, method)
+            self.assertTrue(set(models) <= set(exhaustive), method)
+
+    def test_build_models_sat(self) -> None:
+        exhaustive: List[EquationGroup] = ModelBuilder(
+            self.equations, list(self.input_vars), list(self.output_vars)
+        ).build_models()
+        builder: ModelBuilder = ModelBuilder(
+            self.equations,
+            list(self.input_vars),
+            list(self.output_vars),
+            method="sat",
+        )
+        models: List[EquationGroup] = builder.build_models()
+        self.assertEqual(len(models), len(exhaustive))
+        self.assertEqual(set(models), set(exhaustive))
+
+    def test_count_models(self) -> None:
+        builder: ModelBuilder = ModelBuilder(
+            self.equations, list(self.input_vars), list(self.output_vars)
+        )
+        self.assertEqual(builder.count_models(), len(builder.build_models()))
+
+    def test_build_models_without_duplicates(self) -> None:
+        for method in [
+            "exhaustive",
+            "gradual",
+            "refined_gradual",
+            "two_step_combination",
+            "product_recursive_combination",
+            "sat",
+        ]:
+            builder: ModelBuilder = ModelBuilder(
+                self.equations,
+                list(self.input_vars),
+                list(self.output_vars),
+                method=method,
+            )
+            models: List[EquationGroup] = builder.build_models()
+            self.assertEqual(len(models), len(set(models)), method)
+            keys = [model.key for model in models]
+            self.assertEqual(len(keys), len(set(keys)), method)
+
+    def test_models_contain_given_equations(self) -> None:
+        builder: ModelBuilder = ModelBuilder(
+            self.equations, list(self.input_vars), list(self.output_vars)
+        )
+        models: List[EquationGroup] = builder.build_models()
+        self.assertIn(EquationGroup([self.equations[0]]), models)
+        for model in models:
+            for eq in model.equations:
+                self.assertIn(eq, self.equations)
+
+    def test_models_of_different_builders(self) -> None:
+        other_equations: List[Equation] = [
+            Equation("y = x1 * x2", ["y", "x1", "x2"]),
+            Equation("x2 = 1", ["x2"]),
+        ]
+        models: List[EquationGroup] = ModelBuilder(
+            self.equations, list(self.input_vars), list(self.output_vars)
+        ).build_models()
+        other_models: List[EquationGroup] = ModelBuilder(
+            other_equations, list(self.input_vars), list(self.output_vars)
+        ).build_models()
+        # Both builders number their first equation 0
+        self.assertEqual(models[0].key, other_models[0].key)
+        self.assertNotIn(other_models[0], models)
+        self.assertEqual(
+            len(set(models) | set(other_models)),
+            len(models) + len(other_models),
+        )
+
+    def test_required_variable_without_equation(self) -> None:
+        for method in ["exhaustive", "gradual", "refined_gradual", "sat"]:
+            builder: ModelBuilder = ModelBuilder(
+                self.equations,
+                list(self.input_vars),
+                ["w"],
+                method=method,
+            )
+            self.assertEqual(builder.build_models(), [])
+
+    def test_no_required_variables_excludes_empty_model(self) -> None:
+        for method in ["exhaustive", "gradual", "refined_gradual", "sat"]:
+            builder: ModelBuilder = ModelBuilder(
+                self.equations, [], [], method=method
+            )
+            for model in builder.build_models():
+                self.assertTrue(model.num_equations > 0)
+
+    def test_exhaustive_skips_infeasible_subset_sizes(self) -> None:
+        builder: ModelBuilder = ModelBuilder(
+            self.equations,
+            list(self.input_vars),
+            list(self.output_vars),
+            method="exhaustive",
+        )
+        models: List[EquationGroup] = builder.build_models()
+
+        required_vars = self.input_vars.union(self.output_vars)
+        expected: List[EquationGroup] = [
+            EquationGroup(list(eqs))
+            for n in range(1, len(builder.equations) + 1)
+            for eqs in combinations(builder.equations, n)
+            if EquationGroup(list(eqs)).check_desirability_at_once(
+                self.input_vars, required_vars
+            )
+        ]
+        self.assertEqual(set(models), set(expected))
+        # 4 variables in total: models can hold at most 4 - 2 equations
+        self.assertEqual(builder.stats["skipped_subset_sizes"], 3)
+        self.assertEqual(builder.stats["skipped_subsets"], 10 + 5 + 1)
+
+    def test_on_model_reports_each_model_once(self) -> None:
+        found: List[EquationGroup] = []
+        builder: ModelBuilder = ModelBuilder(
+            self.equations,
+            list(self.input_vars),
+            list(self.output_vars),
+            method="gradual",
+            on_model=found.append,
+        )
+        models: List[EquationGroup] = builder.build_models()
+        self.assertEqual(len(found), len(models))
+        self.assertEqual(set(found), set(models))
+
+    def test_cancel_token_stops_search(self) -> None:
+        cancel_token: CancelToken = CancelToken()
+        cancel_token.cancel()
+        builder: ModelBuilder = ModelBuilder(
+            self.equations,
+            list(self.input_vars),
+            list(self.output_vars),
+            cancel_token=cancel_token,
+        )
+        models: BuildResult = builder.build_models()
+        self.assertTrue(models.incomplete)
+        self.assertEqual(len(models), 0)
+
+    def test_deadline_returns_partial_results(self) -> None:
+        # A model is found right away, but the search over the 26
+        # unrelated equations would not finish in reasonable time
+        equations: List[Equation] = [Equation("y = x", ["y", "x"])] + [
+            Equation(f"a{i} = b{i}", [f"a{i}", f"b{i}"]) for i in range(26)
+        ]
+        builder: ModelBuilder = ModelBuilder(
+            equations, ["x"], ["y"], deadline=time.monotonic() + 0.2
+        )
+        models: BuildResult = builder.build_models()
+        self.assertTrue(models.incomplete)
+        self.assertEqual(len(models), 1)
+        self.assertEqual(models[0].equations[0].equation_str, "y = x")
+
+    def test_progress(self) -> None:
+        reports: List[Tuple[int, int]] = []
+        equations: List[Equation] = [
+            Equation(f"a{i} = b{i}", [f"a{i}", f"b{i}"]) for i in range(12)
+        ]
+        builder: ModelBuilder = ModelBuilder(
+            equations,
+            ["a0"],
+            ["b0"],
+            progress=lambda done, total: reports.append((done, total)),
+        )
+        models: BuildResult = builder.build_models()
+        self.assertFalse(models.incomplete)
+        self.assertGreater(len(reports), 2)
+        # The total is known up front for the exhaustive method
+        n_subsets = 2 ** len(equations) - 1 - builder.stats["skipped_subsets"]
+        self.assertEqual(reports[-1], (n_subsets, n_subsets))
+        for done, total in reports[1:]:
+            self.assertEqual(total, n_subsets)
+
 
 if __name__ == "__main__":
     unittest.main()
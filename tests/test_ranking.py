@@ -0,0 +1,113 @@
+import random
+import time
+import unittest
+from typing import Dict, List, Tuple
+
+from preq_pmob.equation import Equation
+from preq_pmob.equation_group import EquationGroup
+from preq_pmob.model_builder import BuildResult, ModelBuilder
+from preq_pmob.ranking import constant_equation_cost, top_k_models
+from tests.differential import generate_case
+
+
+class TestTopK(unittest.TestCase):
+    def test_matches_sorted_exhaustive_on_random_libraries(self) -> None:
+        rng = random.Random(3)
+        for _ in range(40):
+            case = generate_case(
+                rng,
+                n_equations=rng.randint(3, 10),
+                n_variables=rng.randint(3, 7),
+                n_inputs=rng.randint(0, 2),
+                n_outputs=rng.randint(1, 2),
+            )
+            weights: Dict[str, int] = {
+                eq.equation_str: rng.randint(0, 5) for eq in case.equations
+            }
+            builder: ModelBuilder = ModelBuilder(
+                case.equations, case.input_vars, case.output_vars
+            )
+
+            # Integer costs use the SAT engine, others branch and bound
+            for scale in [1.0, 0.5]:
+
+                def cost(eq: Equation) -> float:
+                    return weights[eq.equation_str] * scale
+
+                def total(model: EquationGroup) -> float:
+                    return sum(cost(eq) for eq in model.equations)
+
+                expected: List[float] = sorted(
+                    total(model) for model in builder.build_models()
+                )
+                for k in [1, 3, 10]:
+                    models: List[EquationGroup] = builder.top_k(k, cost)
+                    self.assertEqual([total(m) for m in models], expected[:k])
+                    for model in models:
+                        self.assertTrue(
+                            model.check_desirability_at_once(
+                                builder.input_vars, builder.required_vars
+                            )
+                        )
+                    self.assertEqual(len(set(models)), len(models))
+
+    def test_constant_equation_cost(self) -> None:
+        equations: List[Equation] = [
+            Equation("x = 1", ["x"]),
+            Equation("y = 2 * x", ["x", "y"]),
+            Equation("y = x + z", ["x", "y", "z"]),
+            Equation("z = 3", ["z"]),
+            Equation("z = x", ["x", "z"]),
+        ]
+        selected = top_k_models(
+            equations, set(), {"x", "y"}, 3, constant_equation_cost
+        )
+        self.assertEqual(selected[0], (0.0, [1, 2, 4]))
+        self.assertEqual([cost for cost, _ in selected], [0.0, 1.0, 1.0])
+
+    def test_models_found_before_checkpoint_raises(self) -> None:
+        equations: List[Equation] = [
+            Equation(f"e{i}", pair)
+            for i, pair in enumerate(
+                [["x", "y"], ["y", "z"], ["x", "z"], ["y", "w"], ["z", "w"]]
+                * 2
+            )
+        ]
+        found: List[Tuple[float, List[int]]] = []
+
+        def checkpoint() -> None:
+            if len(found) == 2:
+                raise KeyboardInterrupt
+
+        with self.assertRaises(KeyboardInterrupt):
+            top_k_models(
+                equations,
+                {"x"},
+                {"x", "y"},
+                5,
+                checkpoint=checkpoint,
+                found=found,
+            )
+        self.assertEqual(len(found), 2)
+        for _, selected in found:
+            model = EquationGroup([equations[i] for i in selected])
+            self.assertTrue(
+                model.check_desirability_at_once({"x"}, {"x", "y"})
+            )
+
+        # ModelBuilder.top_k returns them as an incomplete result
+        builder: ModelBuilder = ModelBuilder(
+            equations, ["x"], ["y"], deadline=time.monotonic() - 1
+        )
+        models: BuildResult = builder.top_k(5)
+        self.assertTrue(models.incomplete)
+        self.assertEqual(models, [])
+
+    def test_negative_cost_is_rejected(self) -> None:
+        equations: List[Equation] = [Equation("x = 1", ["x"])]
+        with self.assertRaises(ValueError):
+            top_k_models(equations, set(), {"x"}, 1, lambda eq: -1.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
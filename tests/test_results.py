@@ -0,0 +1,84 @@
+import random
+import tempfile
+import unittest
+from pathlib import Path
+from typing import FrozenSet, List, Set
+
+from preq_pmob.equation import Equation
+from preq_pmob.model_builder import ModelBuilder
+from preq_pmob.results import ModelSet
+
+
+class TestModelSet(unittest.TestCase):
+    def setUp(self) -> None:
+        self.equations: List[Equation] = [
+            Equation("y = x1 + x2", ["y", "x1", "x2"]),
+            Equation("y = x2 ** 2", ["y", "x2"]),
+            Equation("x2 = 1", ["x2"]),
+            Equation("x1 = 2 * x2", ["x1", "x2"]),
+            Equation("z = x1 + y", ["z", "x1", "y"]),
+        ]
+        self.table: List[str] = ModelSet.equation_table(
+            eq.equation_str for eq in self.equations
+        )
+
+    def test_round_trip(self) -> None:
+        models = ModelBuilder(self.equations, ["x1"], ["y"]).build_models()
+        model_set = ModelSet.from_groups(models, self.table)
+        self.assertEqual(len(model_set), len(models))
+        self.assertEqual(
+            model_set.to_json(),
+            [
+                [eq.equation_str for eq in sorted(model.equations)]
+                for model in models
+            ],
+        )
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "models.npz"
+            model_set.save(path)
+            loaded = ModelSet.load(path)
+        self.assertEqual(loaded.equations, self.table)
+        self.assertEqual(loaded.to_json(), model_set.to_json())
+
+    def test_compare_matches_frozensets(self) -> None:
+        rng = random.Random(0)
+        for _ in range(50):
+            built: List[List[str]] = [
+                rng.sample(self.table, rng.randint(1, 4))
+                for _ in range(rng.randint(0, 12))
+            ]
+            expected: List[List[str]] = [
+                rng.sample(self.table, rng.randint(1, 4))
+                for _ in range(rng.randint(1, 12))
+            ]
+            built_set: Set[FrozenSet[str]] = {frozenset(m) for m in built}
+            expected_set: Set[FrozenSet[str]] = {
+                frozenset(m) for m in expected
+            }
+            result = ModelSet.from_equation_lists(built, self.table).compare(
+                ModelSet.from_equation_lists(expected, self.table)
+            )
+            self.assertEqual(result["n_built"], len(built_set))
+            self.assertEqual(result["n_expected"], len(expected_set))
+            self.assertEqual(
+                result["n_correct"], len(built_set & expected_set)
+            )
+            self.assertEqual(result["success"], built_set == expected_set)
+
+    def test_duplicate_equation_strings(self) -> None:
+        table = ModelSet.equation_table(["a = 1", "b = a", "a = 1"])
+        self.assertEqual(table, ["a = 1", "b = a"])
+
+    def test_unknown_equation(self) -> None:
+        with self.assertRaisesRegex(ValueError, "w = 2"):
+            ModelSet.from_equation_lists([["x2 = 1", "w = 2"]], self.table)
+
+    def test_compare_requires_same_table(self) -> None:
+        model_set = ModelSet.from_equation_lists([["x2 = 1"]], self.table)
+        other = ModelSet.from_equation_lists([["x2 = 1"]], ["x2 = 1"])
+        with self.assertRaises(ValueError):
+            model_set.compare(other)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+import random
+import unittest
+from itertools import product
+from typing import List, Optional, Set
+
+from preq_pmob.equation import Equation
+from preq_pmob.model_builder import ModelBuilder
+from preq_pmob.sat import SatSolver, enumerate_models
+
+
+class TestSatSolver(unittest.TestCase):
+    def test_satisfiable(self) -> None:
+        solver: SatSolver = SatSolver()
+        a, b, c = solver.new_var(), solver.new_var(), solver.new_var()
+        clauses: List[List[int]] = [[a, b], [-a, c], [-c, -b], [-b, a]]
+        for clause in clauses:
+            solver.add_clause(clause)
+        assignment: Optional[List[bool]] = solver.solve()
+        assert assignment is not None
+        for clause in clauses:
+            self.assertTrue(
+                any(assignment[abs(lit) - 1] == (lit > 0) for lit in clause)
+            )
+
+    def test_pigeonhole_is_unsatisfiable(self) -> None:
+        # 4 pigeons in 3 holes
+        solver: SatSolver = SatSolver()
+        p = [[solver.new_var() for _ in range(3)] for _ in range(4)]
+        for pigeon in p:
+            solver.add_clause(pigeon)
+        for hole in range(3):
+            for i in range(4):
+                for j in range(i + 1, 4):
+                    solver.add_clause([-p[i][hole], -p[j][hole]])
+        self.assertIsNone(solver.solve())
+
+    def test_random_formulas_against_brute_force(self) -> None:
+        rng = random.Random(0)
+        for _ in range(50):
+            n_vars = rng.randint(3, 8)
+            clauses = [
+                [
+                    rng.choice([1, -1]) * var
+                    for var in rng.sample(range(1, n_vars + 1), 3)
+                ]
+                for _ in range(rng.randint(5, 40))
+            ]
+            n_models = sum(
+                all(
+                    any(values[abs(lit) - 1] == (lit > 0) for lit in clause)
+                    for clause in clauses
+                )
+                for values in product([False, True], repeat=n_vars)
+            )
+
+            # Enumerate all models with blocking clauses
+            solver: SatSolver = SatSolver()
+            for _ in range(n_vars):
+                solver.new_var()
+            for clause in clauses:
+                solver.add_clause(clause)
+            n_found = 0
+            while (assignment := solver.solve()) is not None:
+                n_found += 1
+                solver.add_clause(
+                    [
+                        -(v + 1) if x else v + 1
+                        for v, x in enumerate(assignment)
+                    ]
+                )
+            self.assertEqual(n_found, n_models)
+
+
+class TestEnumerateModels(unittest.TestCase):
+    def test_matches_exhaustive_on_random_libraries(self) -> None:
+        rng = random.Random(1)
+        for _ in range(30):
+            variables: List[str] = [f"v{i}" for i in range(rng.randint(3, 7))]
+            equations: List[Equation] = [
+                Equation(
+                    f"e{i}",
+                    rng.sample(variables, rng.choice([1, 1, 2, 2, 3])),
+                    i,
+                )
+                for i in range(rng.randint(3, 10))
+            ]
+            required: List[str] = rng.sample(variables, 2)
+            input_vars: Set[str] = set(required[:1])
+            builder: ModelBuilder = ModelBuilder(
+                equations, list(input_vars), required[1:]
+            )
+            expected = {model.ordinals for model in builder.build_models()}
+            found = [
+                tuple(selected)
+                for selected in enumerate_models(
+                    equations, input_vars, set(required)
+                )
+            ]
+            self.assertEqual(len(found), len(set(found)))
+            self.assertEqual(set(found), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
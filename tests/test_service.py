@@ -0,0 +1,107 @@
+import asyncio
+import unittest
+from typing import List, Set
+
+from preq_pmob.equation import Equation
+from preq_pmob.equation_group import EquationGroup
+from preq_pmob.equation_library import EquationLibrary
+from preq_pmob.model_builder import ModelBuilder
+from preq_pmob.service import ModelBuildingService, library_fingerprint
+
+
+class TestModelBuildingService(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.equations: List[Equation] = [
+            Equation("y = x1 + x2", ["y", "x1", "x2"]),
+            Equation("y = x2 ** 2", ["y", "x2"]),
+            Equation("x2 = 1", ["x2"]),
+            Equation("x1 = 2 * x2", ["x1", "x2"]),
+            Equation("z = x1 + y", ["z", "x1", "y"]),
+        ]
+        self.input_vars: List[str] = ["x1", "x2"]
+        self.output_vars: List[str] = ["y"]
+        # A model is found right away, but the search over the 26
+        # unrelated equations would not finish in reasonable time
+        self.large_equations: List[Equation] = [
+            Equation("y = x", ["y", "x"])
+        ] + [Equation(f"a{i} = b{i}", [f"a{i}", f"b{i}"]) for i in range(26)]
+
+    def expected_keys(self) -> Set[object]:
+        builder = ModelBuilder(
+            self.equations, self.input_vars, self.output_vars
+        )
+        return {model.key for model in builder.build_models()}
+
+    async def test_build_models(self) -> None:
+        async with ModelBuildingService(max_workers=1) as service:
+            models: List[EquationGroup] = await service.build_models(
+                self.equations, self.input_vars, self.output_vars
+            )
+        self.assertEqual({model.key for model in models}, self.expected_keys())
+
+    async def test_build_models_from_library(self) -> None:
+        library = EquationLibrary(
+            [
+                Equation("y = x_1 + x_2", ["y", "x_1", "x_2"]),
+                Equation("x_{2} = 1", ["x_{2}"]),
+            ]
+        )
+        builder = ModelBuilder(library, ["x_1", "x2"], ["y"])
+        expected = {model.key for model in builder.build_models()}
+        self.assertTrue(expected)
+        async with ModelBuildingService(max_workers=1) as service:
+            for inputs in (["x_1", "x2"], ["x1", "x_{2}"]):
+                models = await service.build_models(library, inputs, ["y"])
+                self.assertEqual({model.key for model in models}, expected)
+
+    async def test_identical_requests_are_coalesced(self) -> None:
+        async with ModelBuildingService(max_workers=2) as service:
+            results = await asyncio.gather(
+                service.build_models(
+                    self.equations, self.input_vars, self.output_vars
+                ),
+                service.build_models(
+                    self.equations, ["x2", "x1"], self.output_vars
+                ),
+            )
+            self.assertEqual(service.stats["submitted"], 1)
+            self.assertEqual(service.stats["coalesced"], 1)
+        for models in results:
+            keys = {model.key for model in models}
+            self.assertEqual(keys, self.expected_keys())
+
+    async def test_stream_and_cancel(self) -> None:
+        async with ModelBuildingService(max_workers=1) as service:
+            stream = service.stream_models(self.large_equations, ["x"], ["y"])
+            first: EquationGroup = await asyncio.wait_for(
+                stream.__anext__(), timeout=30
+            )
+            self.assertEqual(first.equations[0].equation_str, "y = x")
+            await stream.aclose()
+
+            # The single worker is only free again if the search stopped
+            models = await asyncio.wait_for(
+                service.build_models(
+                    self.equations, self.input_vars, self.output_vars
+                ),
+                timeout=30,
+            )
+            self.assertEqual(
+                {model.key for model in models}, self.expected_keys()
+            )
+
+    def test_library_fingerprint(self) -> None:
+        same = [
+            Equation(eq.equation_str, eq.variables) for eq in self.equations
+        ]
+        self.assertEqual(
+            library_fingerprint(self.equations), library_fingerprint(same)
+        )
+        self.assertNotEqual(
+            library_fingerprint(self.equations),
+            library_fingerprint(self.equations[1:]),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()